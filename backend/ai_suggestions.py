@@ -1,14 +1,276 @@
 """
 AI Workout Suggestions
 Rule-based system with optional xAI (Grok) integration when XAI_API_KEY is set.
+
+Upstream calls share a pooled keep-alive HTTP session and go through a circuit
+breaker: after XAI_BREAKER_FAILURES consecutive failures, requests skip xAI and
+use the rules for XAI_BREAKER_COOLDOWN seconds before a single trial call is let
+through again.
+
+Prompts carry only the fields that shape a suggestion: compact recent rows
+(exercise, sets, reps, duration, completed) plus, when given, a personal
+record / trend summary per exercise (see records.prompt_summaries).
+
+Successful xAI suggestions are cached by a fingerprint of the recent history
+(exercise, sets, reps, duration only) and the record summary, so repeated requests with unchanged
+history never go upstream, and concurrent identical requests are coalesced
+into a single in-flight upstream call. `requests` is only imported once xAI is
+actually used, which keeps it off the startup path. The cache backend is chosen by SUGGESTION_CACHE_URL
+(see cache.py); size and TTL by SUGGESTION_CACHE_SIZE / SUGGESTION_CACHE_TTL.
 """
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
 from typing import List, Dict, Any
 
-import requests
+from cache import create_cache
+from metrics import registry as metrics_registry
+from rule_engine import RuleEngine
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_error = None
+_session_lock = threading.Lock()
+
+_suggestion_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_suggestion_cache():
+    """Return the process-wide suggestion cache, creating it on first use"""
+    global _suggestion_cache
+    with _cache_lock:
+        if _suggestion_cache is None:
+            _suggestion_cache = create_cache(
+                os.environ.get('SUGGESTION_CACHE_URL', 'memory://'),
+                maxsize=int(os.environ.get('SUGGESTION_CACHE_SIZE', 1024)),
+                ttl=float(os.environ.get('SUGGESTION_CACHE_TTL', 600)),
+            )
+    return _suggestion_cache
+
+
+def history_fingerprint(history: List[Dict[str, Any]], records: List[Dict[str, Any]] = None) -> str:
+    """Stable hash of the fields that influence a suggestion (ignores ids and timestamps)"""
+    normalized = [
+        [
+            (w.get('exercise') or '').strip().lower(),
+            int(w.get('sets') or 0),
+            int(w.get('reps') or 0),
+            int(w.get('duration') or 0),
+        ]
+        for w in history
+    ]
+    model = os.environ.get('XAI_MODEL', 'grok-beta')
+    key = [model, normalized, records] if records else [model, normalized]
+    raw = json.dumps(key, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_cached_suggestion(recent_workouts: List[Dict[str, Any]], records: List[Dict[str, Any]] = None):
+    """Cached xAI suggestion for this history (and record summary), or None"""
+    return get_suggestion_cache().get('xai:' + history_fingerprint(recent_workouts, records))
+
+
+def is_rule_fallback(recent_workouts: List[Dict[str, Any]], records: List[Dict[str, Any]] = None) -> bool:
+    """
+    True when xAI is enabled but get_next_suggestion() answered from the rules
+    (breaker open, upstream error); a successful call always fills the xai: entry
+    """
+    return bool(os.environ.get('XAI_API_KEY')) and get_cached_suggestion(recent_workouts, records) is None
+
+
+def compact_history(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Recent workouts reduced to the fields sent upstream"""
+    return [
+        {key: w.get(key) for key in ('exercise', 'sets', 'reps', 'duration', 'completed')}
+        for w in history
+    ]
+
+
+def _get_session():
+    """Return (session, transport error class) for the process-wide pooled session
+
+    Pool size comes from XAI_POOL_SIZE (default 10). Created lazily so each
+    gunicorn worker gets its own connections after fork; this is the only place
+    `requests` is imported.
+    """
+    global _session, _session_error
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            pool_size = int(os.environ.get('XAI_POOL_SIZE', 10))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session, _session_error = session, requests.RequestException
+    return _session, _session_error
+
+
+def _timeouts():
+    """(connect, read) timeouts from XAI_CONNECT_TIMEOUT / XAI_READ_TIMEOUT"""
+    return (
+        float(os.environ.get('XAI_CONNECT_TIMEOUT', 3.05)),
+        float(os.environ.get('XAI_READ_TIMEOUT', 20)),
+    )
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream; in half_open only one trial call is allowed"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.open_count += 1
+                    metrics_registry.inc('fitlog_xai_events_total', {'event': 'breaker_opened'})
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the breaker is open"""
+
+
+class UpstreamError(RuntimeError):
+    """Transport or HTTP error status from xAI (counts towards opening the breaker)"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution
+    The first caller (leader) runs the function; callers arriving while it is in
+    flight wait and receive the same result or exception.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            _count('coalesced')
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
 
-def _call_xai_chat_completion(history: List[Dict[str, Any]]) -> Dict[str, Any]:
+
+_single_flight = SingleFlight()
+
+_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get('XAI_BREAKER_FAILURES', 5)),
+    cooldown=float(os.environ.get('XAI_BREAKER_COOLDOWN', 30)),
+)
+
+# Per-process counters, reported by get_xai_stats()
+_stats = {
+    'xai_suggestions': 0,
+    'fallbacks': 0,
+    'upstream_requests': 0,
+    'upstream_failures': 0,
+    'upstream_latency_ms_total': 0.0,
+    'upstream_latency_ms_max': 0.0,
+    'short_circuited': 0,
+    'cache_hits': 0,
+    'cache_misses': 0,
+    'coalesced': 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+    metrics_registry.inc('fitlog_xai_events_total', {'event': key}, amount)
+
+
+def _record_upstream_latency(elapsed_ms: float):
+    with _stats_lock:
+        _stats['upstream_requests'] += 1
+        _stats['upstream_latency_ms_total'] += elapsed_ms
+        _stats['upstream_latency_ms_max'] = max(_stats['upstream_latency_ms_max'], elapsed_ms)
+    metrics_registry.observe('fitlog_xai_request_duration_seconds', elapsed_ms / 1000)
+
+
+def get_xai_stats() -> Dict[str, Any]:
+    """Snapshot of breaker state, upstream latency and fallback rate for this process"""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot['upstream_latency_ms_total'] = round(snapshot['upstream_latency_ms_total'], 2)
+    snapshot['upstream_latency_ms_max'] = round(snapshot['upstream_latency_ms_max'], 2)
+    requests_made = snapshot['upstream_requests']
+    snapshot['upstream_latency_ms_avg'] = round(snapshot['upstream_latency_ms_total'] / requests_made, 2) if requests_made else 0.0
+    snapshot['fallback_rate'] = round(snapshot['fallbacks'] / snapshot['xai_suggestions'], 4) if snapshot['xai_suggestions'] else 0.0
+    snapshot['breaker_state'] = _breaker.state
+    snapshot['breaker_open_count'] = _breaker.open_count
+    return snapshot
+
+
+def _call_xai_chat_completion(history: List[Dict[str, Any]], records: List[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Call xAI's Chat Completions API to get a JSON suggestion.
 
     Expects env variables:
@@ -26,21 +288,23 @@ def _call_xai_chat_completion(history: List[Dict[str, Any]]) -> Dict[str, Any]:
     model = os.environ.get('XAI_MODEL', 'grok-beta')
 
     system_prompt = (
-        "You are a functional training coach. Given the user's recent workouts, "
-        "suggest ONE next exercise. Return STRICT JSON with keys: exercise (string), "
+        "You are a functional training coach. Given the user's recent workouts "
+        "and, if present, their personal records and weekly trends per exercise, suggest ONE next exercise. Return STRICT JSON with keys: exercise (string), "
         "reason (string), and optionally sets (int), reps (int), duration (int seconds). "
         "Keep parameters realistic."
     )
 
     user_prompt = {
-        'recent_workouts': history
+        'recent_workouts': compact_history(history)
     }
+    if records:
+        user_prompt['personal_records'] = records
 
     payload = {
         'model': model,
         'messages': [
             { 'role': 'system', 'content': system_prompt },
-            { 'role': 'user', 'content': json.dumps(user_prompt) }
+            { 'role': 'user', 'content': json.dumps(user_prompt, separators=(',', ':')) }
         ],
         'temperature': 0.3,
         'response_format': { 'type': 'json_object' }
@@ -52,8 +316,15 @@ def _call_xai_chat_completion(history: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
     url = f"{base_url}/v1/chat/completions"
-    resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=20)
-    resp.raise_for_status()
+    session, transport_error = _get_session()
+    started = time.perf_counter()
+    try:
+        resp = session.post(url, headers=headers, data=json.dumps(payload), timeout=_timeouts())
+        resp.raise_for_status()
+    except transport_error as e:
+        raise UpstreamError(str(e)) from e
+    finally:
+        _record_upstream_latency((time.perf_counter() - started) * 1000)
     data = resp.json()
 
     content = data.get('choices', [{}])[0].get('message', {}).get('content', '{}')
@@ -73,118 +344,145 @@ def _call_xai_chat_completion(history: List[Dict[str, Any]]) -> Dict[str, Any]:
 
     return suggestion
 
-def get_next_suggestion(exercise: str, recent_workouts: List[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """
-    Returns next suggested exercise.
-    - If XAI_API_KEY is set, queries xAI using recent workouts context.
-    - Otherwise, uses rule-based fallback below.
-    """
-    # Try xAI if configured
-    try:
-        if os.environ.get('XAI_API_KEY') and recent_workouts is not None:
-            return _call_xai_chat_completion(recent_workouts)
-    except Exception:
-        # Any failure falls back to rules
-        pass
-
-    # Rule-based fallback
-    exercise_lower = (exercise or '').lower().strip()
-    
+# Rule-based suggestions in priority order: (keywords, suggestion).
+# Keywords match at the start of a word in the exercise name; the first matching rule wins.
+SUGGESTION_RULES = [
     # Rule 1: Squats → Push-ups
-    if 'squat' in exercise_lower:
-        return {
-            'exercise': 'Push-ups',
-            'reason': 'Great leg work! Now balance with upper body strength training.',
-            'sets': 3,
-            'reps': 10
-        }
-    
+    (['squat'], {
+        'exercise': 'Push-ups',
+        'reason': 'Great leg work! Now balance with upper body strength training.',
+        'sets': 3,
+        'reps': 10
+    }),
     # Rule 2: Push-ups → Plank
-    if 'push' in exercise_lower or 'pushup' in exercise_lower:
-        return {
-            'exercise': 'Plank',
-            'reason': 'Core strength follows upper body work. Hold for 30-60 seconds.',
-            'sets': 3,
-            'duration': 45
-        }
-    
+    (['push', 'pushup'], {
+        'exercise': 'Plank',
+        'reason': 'Core strength follows upper body work. Hold for 30-60 seconds.',
+        'sets': 3,
+        'duration': 45
+    }),
     # Rule 3: Plank → Lunges
-    if 'plank' in exercise_lower:
-        return {
-            'exercise': 'Lunges',
-            'reason': 'Core done! Now target your legs with lunges for balance and strength.',
-            'sets': 3,
-            'reps': 12
-        }
-    
+    (['plank'], {
+        'exercise': 'Lunges',
+        'reason': 'Core done! Now target your legs with lunges for balance and strength.',
+        'sets': 3,
+        'reps': 12
+    }),
     # Rule 4: Lunges → Burpees
-    if 'lunge' in exercise_lower:
-        return {
-            'exercise': 'Burpees',
-            'reason': 'Full-body explosive movement to boost your heart rate!',
-            'sets': 3,
-            'reps': 8
-        }
-    
+    (['lunge'], {
+        'exercise': 'Burpees',
+        'reason': 'Full-body explosive movement to boost your heart rate!',
+        'sets': 3,
+        'reps': 8
+    }),
     # Rule 5: Burpees → Mountain Climbers
-    if 'burpee' in exercise_lower:
-        return {
-            'exercise': 'Mountain Climbers',
-            'reason': 'Keep the cardio going with this core and cardio combo.',
-            'sets': 3,
-            'duration': 30
-        }
-    
+    (['burpee'], {
+        'exercise': 'Mountain Climbers',
+        'reason': 'Keep the cardio going with this core and cardio combo.',
+        'sets': 3,
+        'duration': 30
+    }),
     # Rule 6: Mountain Climbers → Deadlifts (bodyweight)
-    if 'mountain' in exercise_lower or 'climber' in exercise_lower:
-        return {
-            'exercise': 'Romanian Deadlifts',
-            'reason': 'Time for posterior chain strength. Focus on hamstrings and glutes.',
-            'sets': 3,
-            'reps': 10
-        }
-    
+    (['mountain', 'climber'], {
+        'exercise': 'Romanian Deadlifts',
+        'reason': 'Time for posterior chain strength. Focus on hamstrings and glutes.',
+        'sets': 3,
+        'reps': 10
+    }),
     # Rule 7: Deadlifts → Pull-ups / Rows
-    if 'deadlift' in exercise_lower:
-        return {
-            'exercise': 'Pull-ups or Rows',
-            'reason': 'Balance that pull movement! Target your back muscles.',
-            'sets': 3,
-            'reps': 8
-        }
-    
+    (['deadlift'], {
+        'exercise': 'Pull-ups or Rows',
+        'reason': 'Balance that pull movement! Target your back muscles.',
+        'sets': 3,
+        'reps': 8
+    }),
     # Rule 8: Pull-ups/Rows → Dips
-    if 'pull' in exercise_lower or 'row' in exercise_lower:
-        return {
-            'exercise': 'Dips',
-            'reason': 'Complement your pull with a push. Target triceps and chest.',
-            'sets': 3,
-            'reps': 10
-        }
-    
+    (['pull', 'row'], {
+        'exercise': 'Dips',
+        'reason': 'Complement your pull with a push. Target triceps and chest.',
+        'sets': 3,
+        'reps': 10
+    }),
     # Rule 9: Dips → Jumping Jacks
-    if 'dip' in exercise_lower:
-        return {
-            'exercise': 'Jumping Jacks',
-            'reason': 'Cardio finisher! Get your heart rate up with this classic move.',
-            'sets': 3,
-            'reps': 20
-        }
-    
+    (['dip'], {
+        'exercise': 'Jumping Jacks',
+        'reason': 'Cardio finisher! Get your heart rate up with this classic move.',
+        'sets': 3,
+        'reps': 20
+    }),
     # Rule 10: Jumping Jacks → Squats (cycle back)
-    if 'jumping' in exercise_lower or 'jack' in exercise_lower:
-        return {
-            'exercise': 'Squats',
-            'reason': 'Cycle complete! Start fresh with squats for lower body strength.',
-            'sets': 3,
-            'reps': 15
-        }
-    
-    # Default suggestion if exercise doesn't match any rule
-    return {
+    (['jumping', 'jack'], {
         'exercise': 'Squats',
-        'reason': 'Try squats to build lower body strength and mobility!',
+        'reason': 'Cycle complete! Start fresh with squats for lower body strength.',
         'sets': 3,
-        'reps': 12
-    }
+        'reps': 15
+    }),
+]
 
+# Default suggestion if exercise doesn't match any rule
+DEFAULT_SUGGESTION = {
+    'exercise': 'Squats',
+    'reason': 'Try squats to build lower body strength and mobility!',
+    'sets': 3,
+    'reps': 12
+}
+
+# Compiled once at import
+_rule_engine = RuleEngine(SUGGESTION_RULES, DEFAULT_SUGGESTION)
+
+def _fetch_xai_suggestion(history: List[Dict[str, Any]], records: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """One guarded upstream call: breaker check, request, breaker bookkeeping, cache fill"""
+    # A flight that finished just before this one started may already have filled the cache
+    cached = get_cached_suggestion(history, records)
+    if cached is not None:
+        return cached
+    if not _breaker.allow_request():
+        raise CircuitOpenError('xAI circuit breaker is open')
+    try:
+        suggestion = _call_xai_chat_completion(history, records)
+    except UpstreamError:
+        # Transport/HTTP failures count towards opening the breaker
+        _breaker.record_failure()
+        _count('upstream_failures')
+        raise
+    except Exception:
+        # Upstream answered but the content was unusable
+        _breaker.record_success()
+        raise
+    _breaker.record_success()
+    get_suggestion_cache().set('xai:' + history_fingerprint(history, records), suggestion)
+    return suggestion
+
+def get_next_suggestion(exercise: str, recent_workouts: List[Dict[str, Any]] = None,
+                        records: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Returns next suggested exercise.
+    - If XAI_API_KEY is set, queries xAI using recent workouts context and the
+      optional personal record summary (unless the circuit breaker is open).
+    - Otherwise, uses rule-based fallback below.
+    """
+    # Try xAI if configured
+    if os.environ.get('XAI_API_KEY') and recent_workouts is not None:
+        _count('xai_suggestions')
+        cached = get_cached_suggestion(recent_workouts, records)
+        if cached is not None:
+            _count('cache_hits')
+            return cached
+        _count('cache_misses')
+
+        try:
+            # Concurrent callers with the same history share one upstream request
+            return dict(_single_flight.do(
+                history_fingerprint(recent_workouts, records),
+                lambda: _fetch_xai_suggestion(recent_workouts, records)
+            ))
+        except CircuitOpenError:
+            _count('short_circuited')
+        except UpstreamError as e:
+            logger.warning('xAI request failed, using rules: %s', e)
+        except Exception as e:
+            logger.warning('Invalid xAI suggestion, using rules: %s', e)
+        _count('fallbacks')
+
+    # Rule-based fallback
+    return _rule_engine.suggest((exercise or '').strip())
@@ -1,11 +1,18 @@
 """
 Flask Application Entry Point
 Main app configuration, database setup, and route registration
+
+Building the app does no database work. Tables are created and migrated once
+per deployment by init_schema(): in the gunicorn master before workers fork
+(gunicorn.conf.py, preload_app), by `flask --app app init-db`, or by
+`python app.py` in development.
 """
-from flask import Flask, jsonify
+import click
+from flask import Flask, jsonify, current_app
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from models import db, User, Workout
+from models import db
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
@@ -13,6 +20,37 @@ from dotenv import load_dotenv
 # Import blueprints (must be after db initialization)
 from auth import auth_bp
 from workouts import workouts_bp
+from stats import init_rollup, rebuild_stats_command
+from ai_suggestions import get_xai_stats
+from revocation import init_revocation
+from database import init_database
+from metrics import metrics_bp, init_metrics
+from exercises import init_catalog, backfill_workouts, migrate_exercises_command
+from precompute import precompute_suggestions_command
+from archive import archive_workouts_command
+
+def init_schema(app):
+    """
+    Create missing tables, apply in-place migrations, seed the exercise catalog,
+    link older workouts to it and backfill the stats rollup (keyed by exercise_id)
+    Idempotent; closes its connections so forked workers start with an empty pool
+    """
+    with app.app_context():
+        db.create_all()
+        init_catalog()
+        backfill_workouts()
+        init_rollup()
+        db.session.remove()
+        db.engine.dispose()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create tables, seed the exercise catalog and backfill the stats rollup (run before starting workers)"""
+    init_schema(current_app._get_current_object())
+    click.echo('Database schema is up to date')
+
 
 def create_app():
     """
@@ -39,13 +77,23 @@ def create_app():
     from datetime import timedelta
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)  # Tokens expire after 24 hours
     
-    # Initialize extensions
-    db.init_app(app)
+    # Initialize extensions (engine options and SQLite pragmas live in database.py)
+    init_database(app)
     jwt = JWTManager(app)
+    init_revocation(jwt)
+    init_metrics(app, db)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(workouts_bp, url_prefix='/api/workouts')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+    
+    # CLI commands (flask rebuild-stats)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(migrate_exercises_command)
+    app.cli.add_command(precompute_suggestions_command)
+    app.cli.add_command(archive_workouts_command)
+    app.cli.add_command(init_db_command)
     
     # Error handlers
     @app.errorhandler(404)
@@ -58,17 +106,14 @@ def create_app():
         """Handle 500 errors"""
         return jsonify({'error': 'Internal server error'}), 500
     
-    # Initialize database tables
-    with app.app_context():
-        db.create_all()
-    
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health_check():
         """Health check endpoint for monitoring"""
         return jsonify({
             'status': 'healthy',
-            'message': 'FitLog API is running'
+            'message': 'FitLog API is running',
+            'xai': get_xai_stats()
         }), 200
     
     return app
@@ -77,4 +122,5 @@ def create_app():
 app = create_app()
 
 if __name__ == '__main__':
+    init_schema(app)
     app.run(debug=True, host='0.0.0.0', port=5000)
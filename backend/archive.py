@@ -0,0 +1,197 @@
+"""
+Workout Archive
+Hot/cold tiering of the workouts table
+
+`flask --app app archive-workouts` (e.g. nightly from cron) moves workouts
+older than the archive horizon, unchanged and with their ids, from `workouts`
+into `workouts_archive` in small batches. The hot table and its indexes then
+only hold recent history, which is what the dashboard, suggestions and
+precompute job read, so their pages stay in the database cache.
+
+Nothing is summarized away: the daily stats rollup counts both tiers, so
+aggregates stay exact, and the list, changes, export, complete and delete
+endpoints read through to the archive. A page of GET /api/workouts only
+queries the archive when the user's newest archived workout would sort within
+the page, i.e. when the client pages past the hot window.
+
+Environment:
+  - ARCHIVE_AFTER_DAYS (optional): default horizon of archive-workouts, default 365
+"""
+import heapq
+import os
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, insert, or_, select, text, union_all
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from models import db, Workout, ArchivedWorkout
+from serialization import WORKOUT_FIELDS, fetch_workouts
+
+# Hot tier first: single-workout lookups almost always hit it
+TIERS = (Workout, ArchivedWorkout)
+
+
+def _position(row):
+    """(timestamp, id) sort key of a workout row"""
+    return row.timestamp, row.id
+
+
+def select_tier_workouts(model):
+    """select_workouts() for either tier"""
+    return select(*[getattr(model, name) for name in WORKOUT_FIELDS])
+
+
+def _page_query(model, user_id, limit, before=None):
+    """Newest-first page of one tier, strictly after the (timestamp, id) position `before`"""
+    query = select_tier_workouts(model).where(model.user_id == user_id)
+    if before is not None:
+        timestamp, workout_id = before
+        query = query.where(or_(
+            model.timestamp < timestamp,
+            and_(model.timestamp == timestamp, model.id < workout_id)
+        ))
+    return query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit)
+
+
+def newest_archived(user_id, before=None):
+    """(timestamp, id) of the user's newest archived workout after `before`, or None"""
+    query = select(ArchivedWorkout.timestamp, ArchivedWorkout.id).where(ArchivedWorkout.user_id == user_id)
+    if before is not None:
+        timestamp, workout_id = before
+        query = query.where(or_(
+            ArchivedWorkout.timestamp < timestamp,
+            and_(ArchivedWorkout.timestamp == timestamp, ArchivedWorkout.id < workout_id)
+        ))
+    row = db.session.execute(query.order_by(ArchivedWorkout.timestamp.desc(), ArchivedWorkout.id.desc()).limit(1)).first()
+    return tuple(row) if row else None
+
+
+def fetch_page(user_id, limit, before=None):
+    """
+    Up to `limit` workout rows (WORKOUT_FIELDS tuples), newest first, after `before`
+    Read from the hot table; the archive is only queried when its rows could
+    belong to this page
+    """
+    rows = fetch_workouts(_page_query(Workout, user_id, limit, before))
+    if len(rows) == limit:
+        newest = newest_archived(user_id, before)
+        if newest is None or newest < _position(rows[-1]):
+            return rows
+
+    archived = fetch_workouts(_page_query(ArchivedWorkout, user_id, limit, before))
+    if not archived:
+        return rows
+    return list(heapq.merge(rows, archived, key=_position, reverse=True))[:limit]
+
+
+def fetch_by_ids(user_id, workout_ids):
+    """WORKOUT_FIELDS rows of the user's workouts with the given ids, from both tiers"""
+    rows = []
+    for model in TIERS:
+        rows += fetch_workouts(select_tier_workouts(model).where(model.user_id == user_id, model.id.in_(workout_ids)))
+    return rows
+
+
+def get_workout(user_id, workout_id):
+    """The user's Workout, or ArchivedWorkout if it has been archived, or None"""
+    for model in TIERS:
+        workout = model.query.filter_by(id=workout_id, user_id=user_id).first()
+        if workout is not None:
+            return workout
+    return None
+
+
+def all_workouts_table(**filters):
+    """
+    Subquery of both tiers' rows with the workouts columns (for full-history aggregates)
+    filters: column=value equality conditions, applied inside each tier so their indexes are used
+    """
+    names = [column.name for column in Workout.__table__.columns]
+    tiers = []
+    for model in TIERS:
+        table = model.__table__
+        tiers.append(select(*[table.c[name] for name in names]).where(
+            *[table.c[column] == value for column, value in filters.items()]
+        ))
+    return union_all(*tiers).subquery('all_workouts')
+
+
+def _has_autoincrement():
+    sql = db.session.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'workouts'")).scalar()
+    return 'AUTOINCREMENT' in (sql or '').upper()
+
+
+def ensure_schema():
+    """
+    Create workouts_archive; on SQLite also rebuild a pre-archive workouts table
+    with AUTOINCREMENT so ids of archived rows are never handed out again
+    """
+    db.create_all()
+    if db.engine.dialect.name != 'sqlite' or _has_autoincrement():
+        return
+
+    table = Workout.__table__
+    columns = ', '.join(column.name for column in table.columns)
+    statements = ['BEGIN IMMEDIATE', 'ALTER TABLE workouts RENAME TO workouts_legacy']
+    statements += [f'DROP INDEX IF EXISTS {index.name}' for index in table.indexes]
+    statements.append(str(CreateTable(table).compile(db.engine)))
+    statements += [str(CreateIndex(index).compile(db.engine)) for index in table.indexes]
+    statements += [
+        f'INSERT INTO workouts ({columns}) SELECT {columns} FROM workouts_legacy',
+        'DROP TABLE workouts_legacy',
+        'COMMIT',
+    ]
+
+    # One explicit transaction around DDL and copy (pysqlite would autocommit the DDL)
+    db.session.remove()
+    raw = db.engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(';\n'.join(statements) + ';')
+    except Exception:
+        raw.driver_connection.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def archive_workouts(older_than, batch_size=5000):
+    """Move workouts with a timestamp before `older_than` to the archive, oldest first; returns rows moved"""
+    hot = Workout.__table__
+    names = [column.name for column in hot.columns]
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            select(hot.c.id).where(hot.c.timestamp < older_than).order_by(hot.c.timestamp).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+
+        # Copy and delete in one short transaction per batch, so writers are only briefly blocked
+        db.session.execute(insert(ArchivedWorkout.__table__).from_select(
+            names, select(*[hot.c[name] for name in names]).where(hot.c.id.in_(ids))
+        ))
+        moved += db.session.execute(delete(hot).where(hot.c.id.in_(ids))).rowcount
+        db.session.commit()
+
+
+@click.command('archive-workouts')
+@click.option('--older-than-days', type=float, default=None,
+              help='Archive workouts older than this [default: ARCHIVE_AFTER_DAYS or 365]')
+@click.option('--batch-size', type=int, default=5000, show_default=True)
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards to shrink the SQLite file')
+@with_appcontext
+def archive_workouts_command(older_than_days, batch_size, vacuum):
+    """Move old workouts from the hot workouts table to workouts_archive"""
+    if older_than_days is None:
+        older_than_days = float(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+    started = time.perf_counter()
+    ensure_schema()
+    moved = archive_workouts(datetime.utcnow() - timedelta(days=older_than_days), batch_size)
+    if vacuum and db.engine.dialect.name == 'sqlite':
+        db.session.remove()
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM'))
+    click.echo(f'Archived {moved} workouts older than {older_than_days:g} days in {time.perf_counter() - started:.2f}s')
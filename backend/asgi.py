@@ -0,0 +1,106 @@
+"""
+ASGI Entry Point
+Async serving mode for the same create_app() application and blueprints
+
+    gunicorn -w 4 -k uvicorn.workers.UvicornWorker asgi:app
+    flask --app app init-db && uvicorn asgi:app --workers 4 --port 5000
+
+Connections and request bodies are handled on the event loop; each request is
+then run by the unchanged Flask app (through asgiref's WsgiToAsgi) on a thread
+from a pool of ASGI_THREADS per process. Flask and SQLite are synchronous, so
+request concurrency is the thread count, the same as `gunicorn app:app` with
+GUNICORN_THREADS set to the same value. What the loop adds is that idle and
+slow client connections do not occupy a thread.
+
+At most ASGI_THREADS + ASGI_QUEUE_SIZE requests are in flight per process;
+beyond that the server answers 503 with Retry-After instead of queueing
+without bound.
+
+Requires the optional packages asgiref and uvicorn (pip install asgiref uvicorn).
+
+Environment:
+  - ASGI_THREADS (optional): request threads per process, default 64
+  - ASGI_QUEUE_SIZE (optional): requests allowed to wait for a thread, default 64
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+
+from app import app as flask_app
+
+# asgiref declares run_wsgi_app thread-sensitive, which runs every request on
+# one shared thread; the undecorated function is re-wrapped for the pool below
+_run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+
+class _PooledInstance(WsgiToAsgiInstance):
+    """WsgiToAsgi request instance that runs the WSGI app on the given executor"""
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(_run_wsgi_app, thread_sensitive=False, executor=self.executor)(self, body)
+
+
+def _merge_cookie_headers(scope):
+    """Join repeated Cookie headers with '; ' (asgiref would join them with ',')"""
+    cookies = [value for name, value in scope.get('headers', []) if name == b'cookie']
+    if len(cookies) < 2:
+        return scope
+    headers = [(name, value) for name, value in scope['headers'] if name != b'cookie']
+    return dict(scope, headers=headers + [(b'cookie', b'; '.join(cookies))])
+
+
+class ThreadPoolASGI:
+    """ASGI app serving a WSGI app from a bounded thread pool"""
+
+    def __init__(self, wsgi_app, threads, queue_size):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.limit = threads + queue_size
+        self.in_flight = 0  # only touched on the event loop thread
+        self._executor = None
+
+    def _get_executor(self):
+        # Created on first use so forked workers never inherit pool threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    if self._executor is not None:
+                        self._executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if self.in_flight >= self.limit:
+            await send({
+                'type': 'http.response.start',
+                'status': 503,
+                'headers': [(b'content-type', b'application/json'), (b'retry-after', b'1')],
+            })
+            await send({'type': 'http.response.body', 'body': b'{"error": "Server busy, retry shortly"}'})
+            return
+
+        self.in_flight += 1
+        try:
+            await _PooledInstance(self.wsgi_app, self._get_executor())(_merge_cookie_headers(scope), receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+app = ThreadPoolASGI(
+    flask_app,
+    threads=int(os.environ.get('ASGI_THREADS', 64)),
+    queue_size=int(os.environ.get('ASGI_QUEUE_SIZE', 64)),
+)
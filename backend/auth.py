@@ -3,20 +3,21 @@ Authentication Blueprint
 JWT-based signup, login, and logout endpoints
 
 Features:
-- Secure password hashing with Werkzeug
+- Secure password hashing with Werkzeug (off the request thread, see passwords.py)
 - JWT token generation and validation
 - User registration and login
 - Token refresh capability
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
 from models import db, User
+from revocation import get_revocation_list
+from passwords import PasswordHasherBusy
+from user_cache import get_current_user_profile
+from serialization import json_response
 
 auth_bp = Blueprint('auth', __name__)
 
-# Store revoked tokens (in production, use Redis)
-blacklisted_tokens = set()
-
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
     """
@@ -38,6 +39,10 @@ def signup():
         if len(password) < 6:
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
+        # Hash before touching the database so no pooled connection is held while it runs
+        new_user = User(username=username, email=email)
+        new_user.set_password(password)
+        
         # Check if user already exists
         if User.query.filter_by(username=username).first():
             return jsonify({'error': 'Username already exists'}), 400
@@ -45,10 +50,6 @@ def signup():
         if User.query.filter_by(email=email).first():
             return jsonify({'error': 'Email already registered'}), 400
         
-        # Create new user
-        new_user = User(username=username, email=email)
-        new_user.set_password(password)
-        
         db.session.add(new_user)
         db.session.commit()
         
@@ -61,6 +62,9 @@ def signup():
             'user': new_user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -87,9 +91,25 @@ def login():
             (User.username == username_or_email) | (User.email == username_or_email)
         ).first()
         
-        if not user or not user.check_password(password):
+        if not user:
             return jsonify({'error': 'Invalid username/email or password'}), 401
         
+        # Return the DB connection to the pool while the (slow) hash is checked
+        db.session.expunge(user)
+        db.session.rollback()
+        
+        if not user.check_password(password):
+            return jsonify({'error': 'Invalid username/email or password'}), 401
+        
+        # Upgrade hashes made with older parameters while we have the plaintext
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.add(user)
+                db.session.commit()
+            except PasswordHasherBusy:
+                db.session.rollback()  # retried on a later login
+        
         # Generate JWT token
         access_token = create_access_token(identity=str(user.id))
         
@@ -99,7 +119,11 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
@@ -108,12 +132,11 @@ def login():
 def logout():
     """
     User logout endpoint
-    Invalidates the current JWT token
-    In production, use Redis to blacklist tokens
+    Revokes the current JWT token until it expires
     """
     try:
-        jti = get_jwt()['jti']  # JWT ID
-        blacklisted_tokens.add(jti)
+        claims = get_jwt()
+        get_revocation_list().revoke(claims['jti'], claims['exp'])
         
         return jsonify({'message': 'Logged out successfully'}), 200
         
@@ -126,16 +149,22 @@ def logout():
 def get_current_user():
     """
     Get current authenticated user information
-    Validates token and returns user data
+    Served from the per-process profile cache; answers 304 when If-None-Match
+    matches the profile's ETag
     """
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        profile, etag = get_current_user_profile()
         
-        if not user:
+        if not profile:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = json_response({'user': profile})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
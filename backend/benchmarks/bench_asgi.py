@@ -0,0 +1,156 @@
+"""
+Sync vs ASGI Serving Benchmark
+Requests/sec and tail latency of `gunicorn app:app` and the ASGI mode (asgi.py)
+with a slow fake xAI upstream and many concurrent clients
+
+Both modes are started as real gunicorn servers (--workers each) against the
+same seeded database; the ASGI one uses uvicorn workers. Clients loop for
+--duration seconds; --suggestion-share of their requests are
+GET /api/workouts/suggestion, which goes upstream every time (suggestion cache
+disabled, distinct histories), the rest are GET /api/workouts list pages. The
+interesting number is the list-page tail latency: in sync mode fast requests
+queue behind requests waiting on xAI.
+
+Both modes get the same --threads per worker (GUNICORN_THREADS for sync,
+ASGI_THREADS for ASGI), so the comparison is of the serving model rather than
+of the thread count.
+
+Requires the optional packages asgiref and uvicorn for the ASGI mode.
+
+Usage (from backend/):
+    python benchmarks/bench_asgi.py [--concurrency 120] [--latency 2.0] [--duration 20]
+    python benchmarks/bench_asgi.py --modes asgi --threads 128 --output asgi.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from common import BACKEND_DIR, temp_database_path, create_bench_app, summarize_latencies
+from fake_xai import start_fake_xai
+from loadtest import Scenario, seed, issue_tokens
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, args, env):
+    """Start gunicorn in the given mode; returns (process, base_url) once /api/health answers"""
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}']
+    if mode == 'asgi':
+        command += ['-k', 'uvicorn.workers.UvicornWorker', 'asgi:app']
+    else:
+        command += ['--threads', str(args.threads), 'app:app']
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{mode} server exited with code {process.returncode}')
+        try:
+            requests.get(base_url + '/api/health', timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def run_mode(mode, args, env, seeded, tokens):
+    """Drive one server with --concurrency closed-loop clients for --duration seconds"""
+    process, base_url = start_server(mode, args, env)
+    scenario = Scenario(mode, base_url, seeded, tokens)
+    stop_at = time.perf_counter() + args.duration
+    users = [user_id for user_id, _ in seeded]
+
+    def client(index):
+        rng = random.Random(args.seed * 1000 + index)
+        while time.perf_counter() < stop_at:
+            user_id = rng.choice(users)
+            if rng.random() < args.suggestion_share:
+                scenario.call('suggestion', 'GET', '/api/workouts/suggestion', user_id, timeout=120)
+            else:
+                scenario.call('list', 'GET', '/api/workouts?limit=20', user_id, timeout=120)
+
+    try:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    total = sum(len(samples) for samples in scenario.samples.values())
+    return {
+        'requests': total,
+        'errors': scenario.errors,
+        'rps': round(total / elapsed, 1),
+        'operations': {op: summarize_latencies(samples) for op, samples in sorted(scenario.samples.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,asgi', help='Comma-separated: sync, asgi')
+    parser.add_argument('--concurrency', type=int, default=120)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per mode')
+    parser.add_argument('--latency', type=float, default=2.0, help='Fake xAI latency in seconds')
+    parser.add_argument('--suggestion-share', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=64, help='Request threads per worker, in both modes')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--workouts-per-user', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    temp_database_path()
+    app = create_bench_app()
+    seeded = seed(app, args.users, args.workouts_per_user, random.Random(args.seed))
+    tokens = issue_tokens(app, seeded)
+    upstream = start_fake_xai(latency=args.latency)
+
+    env = dict(
+        os.environ,
+        XAI_API_KEY='bench',
+        XAI_BASE_URL=upstream.base_url,
+        XAI_POOL_SIZE=str(args.concurrency),
+        SUGGESTION_CACHE_TTL='0',
+        ASGI_THREADS=str(args.threads),
+        ASGI_QUEUE_SIZE=str(args.concurrency),
+    )
+
+    results = {}
+    for mode in args.modes.split(','):
+        before = upstream.request_count
+        results[mode] = run_mode(mode, args, env, seeded, tokens)
+        results[mode]['upstream_calls'] = upstream.request_count - before
+        ops = results[mode]['operations']
+        print(f"{mode:<5} {results[mode]['rps']:8.1f} req/s  errors {results[mode]['errors']:<5}" + ''.join(
+            f"  {op} p50 {stats['p50']:.0f} / p99 {stats['p99']:.0f} ms" for op, stats in ops.items()
+        ))
+    upstream.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
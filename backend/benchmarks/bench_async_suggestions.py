@@ -0,0 +1,80 @@
+"""
+Async Suggestion Load Test
+Shows that a slow xAI upstream no longer blocks POST /api/workouts
+
+Starts the fake xAI server with injected latency, serves the app from a single
+non-threaded WSGI server (the same one-request-at-a-time model as a gunicorn
+sync worker), fires concurrent workout POSTs plus health checks, then polls
+every returned suggestion id until it is ready.
+
+Usage (from backend/):
+    python benchmarks/bench_async_suggestions.py [--clients 20] [--latency 2.0]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import temp_database_path, create_bench_app, signup, serve_in_background, summarize_latencies
+from fake_xai import start_fake_xai
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=2.0, help='Fake upstream latency in seconds')
+    args = parser.parse_args()
+
+    fake = start_fake_xai(latency=args.latency)
+    os.environ['XAI_API_KEY'] = 'fake-key'
+    os.environ['XAI_BASE_URL'] = fake.base_url
+    temp_database_path()
+    app = create_bench_app()
+
+    _, token = signup(app.test_client(), 'loadtest')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    server, base = serve_in_background(app)
+
+    def post_workout(i):
+        return requests.post(f'{base}/api/workouts', headers=headers,
+                             json={'exercise': 'Squats', 'sets': 3, 'reps': 10 + i})
+
+    def health():
+        return requests.get(f'{base}/api/health')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients * 2) as pool:
+        posts = [pool.submit(timed, lambda i=i: post_workout(i)) for i in range(args.clients)]
+        checks = [pool.submit(timed, health) for _ in range(args.clients)]
+        post_results = [f.result() for f in posts]
+        health_results = [f.result() for f in checks]
+
+    pending = {resp.json()['suggestion_id'] for resp, _ in post_results}
+    while pending:
+        for suggestion_id in list(pending):
+            resp = requests.get(f'{base}/api/workouts/suggestions/{suggestion_id}', headers=headers)
+            if resp.status_code != 202:
+                pending.discard(suggestion_id)
+        time.sleep(0.05)
+    all_ready_s = time.perf_counter() - started
+
+    print(f'Fake upstream latency: {args.latency}s, concurrent clients: {args.clients}')
+    print('POST /api/workouts ms:', summarize_latencies([ms for _, ms in post_results]))
+    print('GET /api/health ms:   ', summarize_latencies([ms for _, ms in health_results]))
+    print(f'All suggestions ready after {all_ready_s:.2f}s ({fake.request_count} upstream calls)')
+
+    server.shutdown()
+    fake.shutdown()
+
+
+if __name__ == '__main__':
+    main()
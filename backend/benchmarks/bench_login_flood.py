@@ -0,0 +1,93 @@
+"""
+Login Flood Benchmark
+Login throughput vs. workout-read latency while logins hammer the server
+
+Serves the app from a threaded WSGI server (like a gunicorn gthread worker),
+then for each mode runs --login-clients threads posting logins in a loop while
+one reader thread fetches GET /api/workouts. Modes:
+
+    inline  PASSWORD_HASH_WORKERS=0, hashing on the request threads
+    pool    PASSWORD_HASH_WORKERS=--pool-workers, hashing in the process pool
+
+A read-only run without logins is measured first as the reference.
+
+Usage (from backend/):
+    python benchmarks/bench_login_flood.py [--login-clients 16] [--seconds 10]
+"""
+import argparse
+import os
+import threading
+import time
+
+import requests
+
+from common import temp_database_path, create_bench_app, signup, serve_in_background, summarize_latencies
+
+PASSWORD = 'benchpass'
+
+
+def flood(base, headers, login_clients, seconds):
+    """Run logins and reads concurrently; returns (logins/s, busy responses, read samples)"""
+    stop = threading.Event()
+    logins = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    reads = []
+
+    def login_loop():
+        session = requests.Session()
+        while not stop.is_set():
+            resp = session.post(f'{base}/api/auth/login', json={'username': 'flood', 'password': PASSWORD})
+            with lock:
+                logins['ok' if resp.status_code == 200 else 'busy'] += 1
+
+    def read_loop():
+        session = requests.Session()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            session.get(f'{base}/api/workouts', headers=headers)
+            reads.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(login_clients)]
+    threads.append(threading.Thread(target=read_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return logins['ok'] / seconds, logins['busy'], reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--login-clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--pool-workers', type=int, default=1)
+    args = parser.parse_args()
+
+    import passwords
+
+    temp_database_path()
+    app = create_bench_app()
+    client = app.test_client()
+    _, token = signup(client, 'flood', PASSWORD)
+    headers = {'Authorization': f'Bearer {token}'}
+    for i in range(50):
+        client.post('/api/workouts', headers=headers, json={'exercise': 'Squats', 'sets': 3, 'reps': 10 + i})
+    server, base = serve_in_background(app, threaded=True)
+
+    _, _, reads = flood(base, headers, 0, args.seconds / 2)
+    print('reads only              read ms:', summarize_latencies(reads))
+
+    for mode, workers in (('inline', 0), ('pool', args.pool_workers)):
+        os.environ['PASSWORD_HASH_WORKERS'] = str(workers)
+        passwords._reset_executor()
+        rate, busy, reads = flood(base, headers, args.login_clients, args.seconds)
+        print(f'{mode:<6} logins/s {rate:7.1f} (503s: {busy})  read ms:', summarize_latencies(reads))
+
+    passwords._reset_executor()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Pagination Benchmark
+Measures GET /api/workouts page latency for a light and a heavy user
+
+Seeds one user with a small history and one with a large history (1M rows
+by default), then fetches first pages and deep pages through the Flask test
+client. With keyset pagination the p99 should be flat across both users.
+
+Usage (from backend/):
+    python benchmarks/bench_pagination.py [--heavy-rows 1000000] [--requests 500]
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from common import temp_database_path, create_bench_app, signup, percentile
+
+
+def seed_workouts(db_path, user_id, count, chunk=50000):
+    """Bulk insert synthetic workouts with raw sqlite3 (much faster than the ORM)"""
+    conn = sqlite3.connect(db_path)
+    start = datetime(2015, 1, 1)
+    exercises = ['Squats', 'Push-ups', 'Plank', 'Lunges', 'Burpees']
+    for offset in range(0, count, chunk):
+        rows = [
+            (user_id, exercises[i % len(exercises)], 3, 10, 0, 0,
+             (start + timedelta(minutes=i)).isoformat(sep=' '))
+            for i in range(offset, min(offset + chunk, count))
+        ]
+        conn.executemany(
+            'INSERT INTO workouts (user_id, exercise, sets, reps, duration, completed, timestamp) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+        )
+        conn.commit()
+    conn.close()
+
+
+def measure(client, headers, requests, limit, deep_cursor):
+    """Time first-page and deep-page fetches; returns latency samples in ms"""
+    samples = []
+    for i in range(requests):
+        url = f'/api/workouts?limit={limit}'
+        if deep_cursor and i % 2:
+            url += f'&cursor={deep_cursor}'
+        t0 = time.perf_counter()
+        resp = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == 200, resp.get_json()
+    return samples
+
+
+def find_deep_cursor(client, headers, pages, limit):
+    """Walk forward a number of pages and return the cursor found there"""
+    cursor = None
+    for _ in range(pages):
+        url = f'/api/workouts?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        next_cursor = client.get(url, headers=headers).get_json()['next_cursor']
+        if not next_cursor:
+            break
+        cursor = next_cursor
+    return cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--light-rows', type=int, default=10)
+    parser.add_argument('--heavy-rows', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = temp_database_path()
+    app = create_bench_app()
+    client = app.test_client()
+
+    tokens = {name: signup(client, name) for name in ('light', 'heavy')}
+
+    print(f'Seeding {args.light_rows} + {args.heavy_rows} workouts into {db_path} ...')
+    seed_workouts(db_path, tokens['light'][0], args.light_rows)
+    seed_workouts(db_path, tokens['heavy'][0], args.heavy_rows)
+
+    for name, rows in (('light', args.light_rows), ('heavy', args.heavy_rows)):
+        headers = {'Authorization': f'Bearer {tokens[name][1]}'}
+        deep_cursor = find_deep_cursor(client, headers, pages=20, limit=args.limit)
+        samples = measure(client, headers, args.requests, args.limit, deep_cursor)
+        print(f'{name:>5} ({rows:>8} rows): p50={percentile(samples, 50):6.2f}ms '
+              f'p95={percentile(samples, 95):6.2f}ms p99={percentile(samples, 99):6.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Rule Engine Micro-benchmark
+Compares the old if-chain style (linear substring checks) with the compiled
+RuleEngine at 10, 100 and 1000 rules
+
+Inputs mix exercise names that hit the first rule, the last rule and no rule,
+so the chain's worst case (scan everything) is represented.
+
+Usage (from backend/):
+    python benchmarks/bench_rule_engine.py [--sizes 10 100 1000] [--iterations 20000]
+"""
+import argparse
+import timeit
+
+import common  # noqa: F401  (sets up the import path)
+from rule_engine import RuleEngine
+
+DEFAULT = {'exercise': 'Squats', 'reason': 'default'}
+
+
+def make_rules(count):
+    """Synthetic rules with two keywords each"""
+    return [
+        ([f'move{i:04d}a', f'move{i:04d}b'], {'exercise': f'Next {i}', 'reason': 'synthetic'})
+        for i in range(count)
+    ]
+
+
+def chain_suggest(rules, text):
+    """Equivalent of the original hand-written chain: check each rule's keywords in order"""
+    text = text.lower().strip()
+    for keywords, suggestion in rules:
+        for keyword in keywords:
+            if keyword in text:
+                return suggestion
+    return DEFAULT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f'{"rules":>6} {"chain us/op":>12} {"engine us/op":>13} {"speedup":>8}')
+    for size in args.sizes:
+        rules = make_rules(size)
+        engine = RuleEngine(rules, DEFAULT)
+        inputs = ['Move0000a squats', f'heavy move{size - 1:04d}b', 'Bulgarian split squat with pause']
+
+        for text in inputs:
+            assert chain_suggest(rules, text)['exercise'] == engine.suggest(text)['exercise']
+
+        def run_chain():
+            for text in inputs:
+                chain_suggest(rules, text)
+
+        def run_engine():
+            for text in inputs:
+                engine.suggest(text)
+
+        ops = args.iterations * len(inputs)
+        chain_us = min(timeit.repeat(run_chain, number=args.iterations, repeat=3)) / ops * 1e6
+        engine_us = min(timeit.repeat(run_engine, number=args.iterations, repeat=3)) / ops * 1e6
+        print(f'{size:>6} {chain_us:>12.2f} {engine_us:>13.2f} {chain_us / engine_us:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Serialization Benchmark
+Time to turn 10k workout rows into a JSON response body
+
+Compares the ORM path (Workout objects + to_dict() + jsonify) with column
+tuples encoded by the stdlib and, when installed, by orjson. Each variant
+runs the query too, since object hydration is part of the cost.
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py [--rows 10000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+
+from flask import jsonify
+
+from common import temp_database_path, create_bench_app, signup
+from bench_pagination import seed_workouts
+
+
+def best_of(fn, repeat):
+    """Best wall time in ms over `repeat` runs, plus the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = temp_database_path()
+    app = create_bench_app()
+    user_id, _ = signup(app.test_client(), 'serializer')
+    seed_workouts(db_path, user_id, args.rows)
+
+    from models import db, Workout
+    import serialization
+
+    def orm_jsonify():
+        workouts = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).all()
+        return jsonify({'workouts': [w.to_dict() for w in workouts]}).get_data()
+
+    def tuples(dumps):
+        def run():
+            query = serialization.select_workouts().where(Workout.user_id == user_id).order_by(Workout.timestamp.desc())
+            return dumps({'workouts': serialization.workout_dicts(serialization.fetch_workouts(query))})
+        return run
+
+    def stdlib_dumps(payload):
+        return json.dumps(payload, default=serialization._default, separators=(',', ':')).encode()
+
+    variants = [('ORM + to_dict + jsonify', orm_jsonify), ('tuples + stdlib json', tuples(stdlib_dumps))]
+    if serialization.orjson is not None:
+        variants.append(('tuples + orjson', tuples(serialization.orjson.dumps)))
+    else:
+        print('orjson not installed; skipping the orjson variant')
+
+    with app.test_request_context():
+        reference = None
+        for name, fn in variants:
+            elapsed, body = best_of(fn, args.repeat)
+            decoded = json.loads(body)
+            if reference is None:
+                reference = decoded
+            same = 'identical' if decoded == reference else 'DIFFERENT'
+            print(f'{name:<26} {elapsed:8.1f} ms  {len(body) / 1024:7.0f} KiB  ({same} output)')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+SQLite Concurrency Benchmark
+Mixed readers and writers in separate processes sharing one SQLite file
+
+Each process builds its own app (like a gunicorn worker) and hammers the API
+through the test client for a fixed duration: writers POST workouts, readers
+GET the workout list. Runs once with the tuned settings from database.py and
+once with settings equivalent to the old defaults (rollback journal,
+synchronous=FULL, small page cache, no mmap), reporting throughput, latency
+and "database is locked" failures.
+
+Usage (from backend/):
+    python benchmarks/bench_sqlite_concurrency.py [--writers 4] [--readers 4] [--duration 10]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from common import temp_database_path, create_bench_app, signup, summarize_latencies
+
+BASELINE_ENV = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_BUSY_TIMEOUT': '5000',  # sqlite3 module default
+    'SQLITE_CACHE_SIZE': '2000',    # SQLite default
+    'SQLITE_MMAP_SIZE': '0',
+}
+TUNED_ENV = {}
+
+
+def apply_env(env):
+    """Reset the SQLite tuning variables, then apply the mode's overrides"""
+    for key in BASELINE_ENV:
+        os.environ.pop(key, None)
+    os.environ.update(env)
+
+
+def worker(role, token, env, duration, queue):
+    """Run one reader or writer process and report its samples"""
+    apply_env(env)
+    client = create_bench_app().test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, errors, locked = [], 0, 0
+    deadline = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        if role == 'writer':
+            resp = client.post('/api/workouts', headers=headers, json={'exercise': 'Squats', 'sets': 3, 'reps': i % 20})
+        else:
+            resp = client.get('/api/workouts?limit=50', headers=headers)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if resp.status_code >= 500:
+            errors += 1
+            if 'locked' in json.dumps(resp.get_json()):
+                locked += 1
+        i += 1
+    queue.put((role, latencies, errors, locked))
+
+
+def run_mode(name, env, args):
+    apply_env(env)
+    temp_database_path()
+    client = create_bench_app().test_client()
+    tokens = [signup(client, f'{name}{i}')[1] for i in range(args.writers + args.readers)]
+    for token in tokens:
+        for _ in range(args.seed):
+            client.post('/api/workouts', headers={'Authorization': f'Bearer {token}'}, json={'exercise': 'Plank'})
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    roles = ['writer'] * args.writers + ['reader'] * args.readers
+    procs = [ctx.Process(target=worker, args=(role, token, env, args.duration, queue))
+             for role, token in zip(roles, tokens)]
+    for p in procs:
+        p.start()
+    results = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    report = {'mode': name}
+    for role in ('writer', 'reader'):
+        samples = [ms for r, lat, _, _ in results if r == role for ms in lat]
+        report[role] = {
+            'ops_per_sec': round(len(samples) / args.duration, 1),
+            'errors': sum(e for r, _, e, _ in results if r == role),
+            'locked': sum(lk for r, _, _, lk in results if r == role),
+            'latency_ms': summarize_latencies(samples) if samples else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode')
+    parser.add_argument('--seed', type=int, default=50, help='Workouts per user before the run')
+    parser.add_argument('--mode', choices=['tuned', 'baseline', 'both'], default='both')
+    args = parser.parse_args()
+
+    modes = {'baseline': BASELINE_ENV, 'tuned': TUNED_ENV}
+    selected = modes if args.mode == 'both' else {args.mode: modes[args.mode]}
+    for name, env in selected.items():
+        print(json.dumps(run_mode(name, env, args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup Benchmark
+Cold-start cost of a worker: importing the app and serving its first requests
+
+Each run starts a fresh interpreter that imports `app` (which builds the app
+with create_app()) and then sends the first GET /api/health and the first and
+second authenticated GET /api/workouts through the test client, timing each
+step. It also records DDL statements issued during import (expected: none,
+the schema is set up once by init_schema) and whether `requests` was imported
+(expected: no, it is loaded on first xAI use).
+
+Prints median and max per step over --runs. The script exits 1 when importing
+the app ran DDL or loaded requests, or when a median exceeds --max-import-ms or
+--max-first-request-ms, so CI can track startup regressions.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 1500] [--max-first-request-ms 250]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import BACKEND_DIR, temp_database_path, create_bench_app, signup
+
+CHILD = r'''
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.environ['BENCH_BACKEND_DIR'])
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ddl = []
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def record_ddl(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith(('CREATE', 'ALTER', 'DROP')):
+        ddl.append(statement)
+
+import app as app_module
+imported = time.perf_counter()
+
+client = app_module.app.test_client()
+headers = {'Authorization': 'Bearer ' + os.environ['BENCH_TOKEN']}
+timings = {'import_ms': (imported - started) * 1000}
+for name, path, request_headers in [
+    ('first_health_ms', '/api/health', {}),
+    ('first_list_ms', '/api/workouts', headers),
+    ('second_list_ms', '/api/workouts', headers),
+]:
+    t0 = time.perf_counter()
+    status = client.get(path, headers=request_headers).status_code
+    timings[name] = (time.perf_counter() - t0) * 1000
+    assert status == 200, (path, status)
+
+timings['ddl_statements'] = len(ddl)
+timings['requests_imported'] = 'requests' in sys.modules
+print(json.dumps(timings))
+'''
+
+STEPS = ('process_ms', 'import_ms', 'first_health_ms', 'first_list_ms', 'second_list_ms')
+
+
+def run_once(env):
+    """One cold start in a fresh interpreter; returns its timings"""
+    t0 = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - t0) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=None)
+    parser.add_argument('--max-first-request-ms', type=float, default=None)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    # Schema and a user are set up once, like a deployment's init step
+    temp_database_path()
+    app = create_bench_app()
+    _, token = signup(app.test_client(), 'startup')
+    env = dict(os.environ, BENCH_BACKEND_DIR=BACKEND_DIR, BENCH_TOKEN=token)
+    env.pop('XAI_API_KEY', None)
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    summary = {}
+    for step in STEPS:
+        values = [run[step] for run in runs]
+        summary[step] = {'median': round(statistics.median(values), 1), 'max': round(max(values), 1)}
+        print(f'{step:<16} median {summary[step]["median"]:8.1f} ms   max {summary[step]["max"]:8.1f} ms')
+    ddl = max(run['ddl_statements'] for run in runs)
+    requests_imported = any(run['requests_imported'] for run in runs)
+    print(f'DDL statements during import: {ddl}; requests imported at startup: {requests_imported}')
+
+    failures = []
+    if ddl:
+        failures.append('import ran DDL')
+    if requests_imported:
+        failures.append('requests was imported at startup')
+    if args.max_import_ms is not None and summary['import_ms']['median'] > args.max_import_ms:
+        failures.append(f'import median {summary["import_ms"]["median"]} ms > {args.max_import_ms} ms')
+    if args.max_first_request_ms is not None:
+        first = max(summary['first_health_ms']['median'], summary['first_list_ms']['median'])
+        if first > args.max_first_request_ms:
+            failures.append(f'first request median {first} ms > {args.max_first_request_ms} ms')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': runs, 'summary': summary, 'failures': failures}, f, indent=2)
+    if failures:
+        print('FAILED: ' + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
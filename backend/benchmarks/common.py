@@ -0,0 +1,72 @@
+"""
+Benchmark Helpers
+Shared setup for the scripts in this folder: import path, throwaway
+database, app factory and latency percentiles
+"""
+import os
+import sys
+import tempfile
+import threading
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def temp_database_path():
+    """Point DATABASE_URL at a fresh SQLite file and return its path"""
+    db_path = os.path.join(tempfile.mkdtemp(prefix='fitlog-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    return db_path
+
+
+def create_bench_app():
+    """Create the Flask app against the current DATABASE_URL, with its schema"""
+    from app import create_app, init_schema
+    app = create_app()
+    init_schema(app)
+    return app
+
+
+def signup(client, username, password='benchpass'):
+    """Register a user through the API; returns (user_id, token)"""
+    resp = client.post('/api/auth/signup', json={
+        'username': username, 'email': f'{username}@bench.local', 'password': password
+    })
+    data = resp.get_json()
+    return data['user']['id'], data['token']
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve_in_background(app, threaded=False):
+    """
+    Serve the app over real HTTP on a background thread; returns (server, base_url)
+    threaded=False handles one request at a time, like a gunicorn sync worker
+    """
+    server = make_server('127.0.0.1', 0, app, threaded=threaded, request_handler=_QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, int(round(pct / 100.0 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def summarize_latencies(samples):
+    """p50/p95/p99/max of latency samples (ms)"""
+    return {
+        'count': len(samples),
+        'p50': round(percentile(samples, 50), 2),
+        'p95': round(percentile(samples, 95), 2),
+        'p99': round(percentile(samples, 99), 2),
+        'max': round(max(samples), 2),
+    }
@@ -0,0 +1,93 @@
+"""
+Fake xAI Server
+Local stand-in for the xAI Chat Completions API with injectable latency
+
+Answers POST /v1/chat/completions with a fixed JSON suggestion after sleeping
+for --latency seconds, and counts requests so benchmarks can assert how many
+calls reached "upstream".
+
+Usage:
+    python benchmarks/fake_xai.py --port 8808 --latency 2.0
+    XAI_API_KEY=fake XAI_BASE_URL=http://127.0.0.1:8808 python app.py
+
+Or in-process from another script:
+    server = start_fake_xai(latency=2.0)
+    ... server.request_count ...
+    server.shutdown()
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUGGESTION = {
+    'exercise': 'Plank',
+    'reason': 'Fake upstream suggestion for benchmarking.',
+    'sets': 3,
+    'duration': 45
+}
+
+
+class FakeXAIHandler(BaseHTTPRequestHandler):
+    """Handles chat completion requests with a configurable delay"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        with self.server.count_lock:
+            self.server.request_count += 1
+        time.sleep(self.server.latency)
+
+        body = json.dumps({
+            'choices': [{'message': {'role': 'assistant', 'content': json.dumps(SUGGESTION)}}]
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeXAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency):
+        super().__init__(address, FakeXAIHandler)
+        self.latency = latency
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_fake_xai(latency=0.0, host='127.0.0.1', port=0):
+    """Start a fake xAI server on a background thread and return it"""
+    server = FakeXAIServer((host, port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake xAI chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8808)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to sleep per request')
+    args = parser.parse_args()
+
+    server = FakeXAIServer((args.host, args.port), args.latency)
+    print(f'Fake xAI listening on {server.base_url} (latency {args.latency}s)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Load Test Harness
+Seeds a synthetic dataset and runs scripted traffic scenarios over real HTTP
+
+Seeds --users users with --workouts-per-user workouts each, starts the fake
+xAI server with injected latency, serves the app from a threaded WSGI server
+and runs each scenario with --concurrency client threads:
+
+    login_storm       POST /api/auth/login for random users
+    dashboard_reads   list, stats, suggestion and profile reads
+    write_bursts      create, complete and delete workouts
+    suggestion_heavy  create workouts and poll the background suggestions
+
+Throughput and p50/p95/p99 per scenario (and per operation) are written as
+JSON. With --baseline the run is compared against a stored result and the
+script exits 1 when p95 or throughput regress by more than --tolerance, so CI
+can gate on it. --seed makes the dataset and request mix reproducible.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py --output loadtest.json
+    python benchmarks/loadtest.py --baseline loadtest.json --tolerance 0.25
+    python benchmarks/loadtest.py --scenarios dashboard_reads --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+from common import temp_database_path, create_bench_app, serve_in_background, summarize_latencies
+from fake_xai import start_fake_xai
+
+PASSWORD = 'benchpass'
+EXERCISES = ['Squats', 'Push-ups', 'Plank', 'Lunges', 'Burpees', 'Rows', 'Deadlift', 'Pull-ups']
+
+
+def seed(app, users, workouts_per_user, rng):
+    """Insert users and workouts with executemany; returns [(user_id, username)]"""
+    from sqlalchemy import insert, select
+    from models import db, User, Workout
+    from stats import rebuild_rollup
+    from exercises import backfill_workouts
+    from passwords import hash_password
+
+    password_hash = hash_password(PASSWORD)
+    start = datetime.utcnow() - timedelta(days=365)
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {'username': f'load{i}', 'email': f'load{i}@bench.local', 'password_hash': password_hash}
+            for i in range(users)
+        ])
+        seeded = db.session.execute(select(User.id, User.username).order_by(User.id)).all()
+        for user_id, _ in seeded:
+            db.session.execute(insert(Workout), [
+                {
+                    'user_id': user_id,
+                    'exercise': rng.choice(EXERCISES),
+                    'sets': rng.randint(1, 5),
+                    'reps': rng.randint(5, 20),
+                    'duration': 0,
+                    'completed': rng.random() < 0.7,
+                    'timestamp': start + timedelta(minutes=30 * i + rng.randint(0, 29)),
+                }
+                for i in range(workouts_per_user)
+            ])
+        backfill_workouts()
+        rebuild_rollup()
+        db.session.commit()
+    return [tuple(row) for row in seeded]
+
+
+def issue_tokens(app, seeded):
+    """Access tokens for every seeded user, without going through login"""
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        return {user_id: create_access_token(identity=str(user_id)) for user_id, _ in seeded}
+
+
+class Scenario:
+    """Runs one scripted operation repeatedly and records latency per operation"""
+
+    def __init__(self, name, base_url, seeded, tokens):
+        self.name = name
+        self.base_url = base_url
+        self.seeded = seeded
+        self.tokens = tokens
+        self.samples = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def call(self, op, method, path, user_id=None, ok=(200, 201, 202), **kwargs):
+        headers = {'Authorization': f'Bearer {self.tokens[user_id]}'} if user_id else {}
+        t0 = time.perf_counter()
+        try:
+            resp = self.session().request(method, self.base_url + path, headers=headers, **kwargs)
+        except requests.RequestException:
+            resp = None
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self.samples.setdefault(op, []).append(elapsed_ms)
+            if resp is None or resp.status_code not in ok:
+                self.errors += 1
+        return resp
+
+    def step(self, rng):
+        getattr(self, self.name)(rng)
+
+    def login_storm(self, rng):
+        _, username = rng.choice(self.seeded)
+        self.call('login', 'POST', '/api/auth/login', json={'username': username, 'password': PASSWORD})
+
+    def dashboard_reads(self, rng):
+        user_id, _ = rng.choice(self.seeded)
+        roll = rng.random()
+        if roll < 0.5:
+            self.call('list', 'GET', '/api/workouts', user_id)
+        elif roll < 0.7:
+            self.call('stats', 'GET', '/api/workouts/stats?days=30', user_id)
+        elif roll < 0.9:
+            self.call('suggestion', 'GET', '/api/workouts/suggestion', user_id)
+        else:
+            self.call('me', 'GET', '/api/auth/me', user_id)
+
+    def write_bursts(self, rng):
+        user_id, _ = rng.choice(self.seeded)
+        resp = self.call('create', 'POST', '/api/workouts', user_id, json={
+            'exercise': rng.choice(EXERCISES), 'sets': rng.randint(1, 5), 'reps': rng.randint(5, 20)
+        })
+        if resp is None or resp.status_code != 201:
+            return
+        workout_id = resp.json()['workout']['id']
+        if rng.random() < 0.5:
+            self.call('complete', 'PUT', f'/api/workouts/{workout_id}/complete', user_id)
+        elif rng.random() < 0.5:
+            self.call('delete', 'DELETE', f'/api/workouts/{workout_id}', user_id)
+
+    def suggestion_heavy(self, rng):
+        user_id, _ = rng.choice(self.seeded)
+        resp = self.call('create', 'POST', '/api/workouts', user_id, json={
+            'exercise': rng.choice(EXERCISES), 'sets': 3, 'reps': rng.randint(5, 20)
+        })
+        if resp is None or resp.status_code != 201:
+            return
+        suggestion_id = resp.json()['suggestion_id']
+        t0 = time.perf_counter()
+        for _ in range(200):
+            poll = self.call('poll', 'GET', f'/api/workouts/suggestions/{suggestion_id}', user_id)
+            if poll is None or poll.status_code != 202:
+                break
+            time.sleep(0.02)
+        with self._lock:
+            self.samples.setdefault('suggestion_ready', []).append((time.perf_counter() - t0) * 1000)
+        self.call('suggestion', 'GET', '/api/workouts/suggestion', user_id)
+
+
+SCENARIOS = ['login_storm', 'dashboard_reads', 'write_bursts', 'suggestion_heavy']
+
+# Derived timings that are not HTTP requests and are excluded from throughput
+DERIVED_OPS = {'suggestion_ready'}
+
+
+def run_scenario(name, base_url, seeded, tokens, total_steps, concurrency, seed_value):
+    scenario = Scenario(name, base_url, seeded, tokens)
+    per_worker = [total_steps // concurrency + (1 if i < total_steps % concurrency else 0) for i in range(concurrency)]
+
+    def worker(index):
+        rng = random.Random(f'{seed_value}:{name}:{index}')
+        for _ in range(per_worker[index]):
+            scenario.step(rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    request_samples = [ms for op, samples in scenario.samples.items() if op not in DERIVED_OPS for ms in samples]
+    return {
+        'steps': total_steps,
+        'requests': len(request_samples),
+        'errors': scenario.errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(request_samples) / elapsed, 2),
+        'latency_ms': summarize_latencies(request_samples),
+        'ops': {op: summarize_latencies(samples) for op, samples in sorted(scenario.samples.items())},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Per-scenario ratios against a baseline; returns (report, regressed)"""
+    report, regressed = {}, False
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        p95_ratio = current['latency_ms']['p95'] / max(previous['latency_ms']['p95'], 0.01)
+        rps_ratio = current['throughput_rps'] / max(previous['throughput_rps'], 0.01)
+        failed = p95_ratio > 1 + tolerance or rps_ratio < 1 - tolerance
+        regressed = regressed or failed
+        report[name] = {
+            'p95_ratio': round(p95_ratio, 3),
+            'throughput_ratio': round(rps_ratio, 3),
+            'regressed': failed,
+        }
+    return report, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workouts-per-user', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=400, help='Scripted steps per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--xai-latency', type=float, default=0.2, help='Fake upstream latency in seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results JSON to this file (default: stdout)')
+    parser.add_argument('--baseline', help='Compare against a previous results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    fake = start_fake_xai(latency=args.xai_latency)
+    os.environ['XAI_API_KEY'] = 'fake-key'
+    os.environ['XAI_BASE_URL'] = fake.base_url
+    temp_database_path()
+    app = create_bench_app()
+
+    rng = random.Random(args.seed)
+    seed_started = time.perf_counter()
+    seeded = seed(app, args.users, args.workouts_per_user, rng)
+    seed_s = time.perf_counter() - seed_started
+    tokens = issue_tokens(app, seeded)
+    server, base_url = serve_in_background(app, threaded=True)
+
+    results = {
+        'config': {
+            'users': args.users,
+            'workouts_per_user': args.workouts_per_user,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'xai_latency_s': args.xai_latency,
+            'seed': args.seed,
+        },
+        'seed_s': round(seed_s, 3),
+        'scenarios': {},
+    }
+    for name in names:
+        print(f'running {name}...', file=sys.stderr)
+        results['scenarios'][name] = run_scenario(
+            name, base_url, seeded, tokens, args.requests, args.concurrency, args.seed
+        )
+    results['upstream_calls'] = fake.request_count
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results['comparison'], regressed = compare(results, baseline, args.tolerance)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    server.shutdown()
+    fake.shutdown()
+    if regressed:
+        print('performance regression against baseline', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Single-Flight Stress Test
+N concurrent callers with an identical history must produce exactly one
+upstream xAI request
+
+Runs against the local fake xAI server with enough latency that every caller
+arrives while the first request is still in flight. Repeats for several
+rounds (clearing the suggestion cache each time) and exits non-zero if any
+round sent more than one request upstream.
+
+Usage (from backend/):
+    python benchmarks/stress_single_flight.py [--callers 50] [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import threading
+
+import common  # noqa: F401  (sets up the import path)
+from fake_xai import start_fake_xai
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--callers', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.5, help='Fake upstream latency in seconds')
+    args = parser.parse_args()
+
+    fake = start_fake_xai(latency=args.latency)
+    os.environ['XAI_API_KEY'] = 'fake-key'
+    os.environ['XAI_BASE_URL'] = fake.base_url
+    os.environ['SUGGESTION_CACHE_URL'] = 'memory://'
+
+    import ai_suggestions
+
+    history = [{'id': 1, 'exercise': 'Squats', 'sets': 3, 'reps': 12, 'duration': 0}]
+    failed = False
+    for round_number in range(1, args.rounds + 1):
+        ai_suggestions.get_suggestion_cache().clear()
+        before = fake.request_count
+        barrier = threading.Barrier(args.callers)
+        results = []
+
+        def caller():
+            barrier.wait()
+            results.append(ai_suggestions.get_next_suggestion('Squats', recent_workouts=history))
+
+        threads = [threading.Thread(target=caller) for _ in range(args.callers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        upstream = fake.request_count - before
+        from_upstream = sum(1 for r in results if r['exercise'] == 'Plank')
+        ok = upstream == 1 and from_upstream == args.callers
+        failed = failed or not ok
+        print(f'round {round_number}: {args.callers} callers -> {upstream} upstream request(s), '
+              f'{from_upstream} upstream results {"OK" if ok else "FAIL"}')
+
+    print('stats:', ai_suggestions.get_xai_stats())
+    fake.shutdown()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Bulk Workout Import
+Streaming validation and chunked inserts for POST /api/workouts/bulk
+
+Rows are validated and inserted in a single pass inside one transaction:
+valid rows are buffered up to the chunk size and written with one executemany
+per chunk, so memory is bounded by the chunk size (for NDJSON bodies) rather
+than by the payload. Any invalid row rolls back the whole import; validation
+continues so every error (up to MAX_REPORTED_ERRORS) is reported at once.
+No suggestions are generated for imported rows.
+"""
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, literal
+
+from models import db, Workout, WorkoutChange
+import stats
+import records
+from exercises import resolve_exercise_id
+
+MAX_REPORTED_ERRORS = 50
+
+# How far past the server clock an imported timestamp may be (client clock skew)
+MAX_FUTURE_SKEW = timedelta(minutes=5)
+
+
+class BulkImportError(ValueError):
+    """Raised when the payload itself cannot be read (not a per-row error)"""
+
+
+def iter_payload(req):
+    """
+    Yield workout objects from the request body
+    application/x-ndjson (or application/jsonl) is read line by line from the
+    stream; anything else must be a JSON array (or {"workouts": [...]})
+    """
+    if req.mimetype in ('application/x-ndjson', 'application/jsonl', 'application/ndjson'):
+        # The raw request stream reads line-by-line one byte at a time; buffer it
+        stream = io.BufferedReader(req.stream, buffer_size=64 * 1024)
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise BulkImportError(f'Invalid JSON on line {line_number}')
+        return
+
+    data = req.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('workouts')
+    if not isinstance(data, list):
+        raise BulkImportError('Expected a JSON array of workouts or an NDJSON body')
+    yield from data
+
+
+def _non_negative_int(item, key, default):
+    value = item.get(key, default)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0 or int(value) != value:
+        raise ValueError(f'{key} must be a non-negative integer')
+    return int(value)
+
+
+def validate_workout(item, user_id, now):
+    """Turn one payload object into a workouts row dict; raises ValueError if invalid"""
+    if not isinstance(item, dict):
+        raise ValueError('Workout must be a JSON object')
+
+    exercise = item.get('exercise')
+    if not isinstance(exercise, str) or not exercise.strip():
+        raise ValueError('Exercise name is required')
+    if len(exercise) > 100:
+        raise ValueError('Exercise name must be at most 100 characters')
+
+    timestamp = item.get('timestamp')
+    if timestamp is None:
+        timestamp = now
+    else:
+        try:
+            timestamp = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError('timestamp must be an ISO 8601 datetime')
+        if timestamp.tzinfo is not None:
+            # Stored timestamps are naive UTC
+            timestamp = (timestamp - timestamp.utcoffset()).replace(tzinfo=None)
+        # Future rows would sort above every real workout in the list forever
+        if timestamp > now + MAX_FUTURE_SKEW:
+            raise ValueError('timestamp must not be in the future')
+
+    return {
+        'user_id': user_id,
+        'exercise': exercise,
+        'sets': _non_negative_int(item, 'sets', 1),
+        'reps': _non_negative_int(item, 'reps', 0),
+        'duration': _non_negative_int(item, 'duration', 0),
+        'completed': bool(item.get('completed', False)),
+        'timestamp': timestamp,
+    }
+
+
+def import_workouts(user_id, items, chunk_size=None, max_rows=None):
+    """
+    Validate and insert workouts for a user in one transaction
+    Returns (imported_count, errors); nothing is committed if errors is non-empty
+    """
+    chunk_size = chunk_size or int(os.environ.get('BULK_CHUNK_SIZE', 1000))
+    max_rows = max_rows or int(os.environ.get('BULK_MAX_ROWS', 200000))
+    now = datetime.utcnow()
+    table = Workout.__table__
+    last_id_before = db.session.query(db.func.max(Workout.id)).scalar() or 0
+
+    errors = []
+    buckets = stats.new_bulk_buckets()
+    exercise_ids = set()
+    chunk = []
+    count = 0
+
+    try:
+        for index, item in enumerate(items):
+            if index >= max_rows:
+                errors.append({'index': index, 'error': f'Too many workouts (max {max_rows})'})
+                break
+            try:
+                row = validate_workout(item, user_id, now)
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+                if len(errors) >= MAX_REPORTED_ERRORS:
+                    break
+                continue
+
+            # After the first error keep validating but stop writing
+            if errors:
+                continue
+            row['exercise_id'] = resolve_exercise_id(row['exercise'])
+            exercise_ids.add(row['exercise_id'])
+            chunk.append(row)
+            stats.add_to_buckets(buckets, row)
+            if len(chunk) >= chunk_size:
+                db.session.execute(insert(table), chunk)
+                count += len(chunk)
+                chunk = []
+
+        if errors:
+            db.session.rollback()
+            return 0, errors
+
+        if chunk:
+            db.session.execute(insert(table), chunk)
+            count += len(chunk)
+
+        if count:
+            # One change-log entry per imported row, written set-based
+            db.session.execute(insert(WorkoutChange.__table__).from_select(
+                ['user_id', 'workout_id', 'op', 'created_at'],
+                select(table.c.user_id, table.c.id, literal(WorkoutChange.OP_UPSERT), literal(now))
+                .where(table.c.user_id == user_id, table.c.id > last_id_before)
+                .order_by(table.c.id)
+            ))
+            stats.apply_bulk(user_id, buckets)
+            records.recompute(user_id, exercise_ids)
+
+        db.session.commit()
+        return count, []
+
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,170 @@
+"""
+Cache Backends
+Small key/value caches with TTL and LRU eviction behind one interface
+
+Backends are selected by URL:
+  - memory://               in-process (per gunicorn worker)
+  - sqlite:////path/file.db shared by every worker on the host
+  - redis://host:port/db    shared across hosts (requires the optional `redis` package)
+
+Values must be JSON-serializable; get() returns None on a miss.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL
+    Values are copied on set and get so callers can't mutate a cached entry,
+    matching the serializing backends.
+    """
+
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Cache in a standalone SQLite file, shared by all processes on the host
+    LRU is approximated by an accessed_at column; eviction runs every
+    `evict_every` writes to keep sets cheap.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=600, evict_every=64):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), expires_at, now)
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries ORDER BY accessed_at '
+            'LIMIT max(0, (SELECT COUNT(*) FROM cache_entries) - ?))',
+            (self.maxsize,)
+        )
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache_entries')
+
+
+class RedisCache:
+    """Redis-backed cache; size bound and LRU come from the server's maxmemory policy"""
+
+    def __init__(self, url, ttl=600, prefix='fitlog:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('redis:// cache URLs require the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl if ttl is not None else self.ttl))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def create_cache(url='memory://', maxsize=1024, ttl=600):
+    """Build a cache backend from a URL (see module docstring)"""
+    if url.startswith('memory://'):
+        return MemoryCache(maxsize=maxsize, ttl=ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):], maxsize=maxsize, ttl=ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, ttl=ttl)
+    raise ValueError(f'Unsupported cache URL: {url}')
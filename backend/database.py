@@ -0,0 +1,71 @@
+"""
+Database Engine Configuration
+Engine options and per-connection settings for the SQLAlchemy engine
+
+SQLite (the default) is tuned for several gunicorn processes sharing one file:
+WAL journaling lets readers proceed during writes, synchronous=NORMAL is safe
+under WAL, and a busy timeout makes writers wait for the lock instead of
+failing with "database is locked". Other backends get connection-pool settings.
+
+Environment:
+  SQLite:  SQLITE_JOURNAL_MODE (WAL), SQLITE_SYNCHRONOUS (NORMAL),
+           SQLITE_BUSY_TIMEOUT ms (5000), SQLITE_CACHE_SIZE KiB (20000),
+           SQLITE_MMAP_SIZE bytes (268435456)
+  Others:  DB_POOL_SIZE (5), DB_MAX_OVERFLOW (10), DB_POOL_PRE_PING (true),
+           DB_POOL_RECYCLE seconds (1800)
+"""
+import os
+
+from sqlalchemy import event
+
+from models import db
+
+
+def _is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def sqlite_pragmas():
+    """PRAGMA statements applied to every new SQLite connection"""
+    return [
+        f"PRAGMA journal_mode={os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"PRAGMA synchronous={os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_SIZE', 20000))}",
+        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))}",
+    ]
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URI"""
+    if _is_sqlite(uri):
+        # Python-level lock wait, matching the busy_timeout pragma
+        return {'connect_args': {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)) / 1000}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+
+
+def init_database(app):
+    """Apply engine options, bind db to the app and install connection hooks"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = engine_options(uri)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    db.init_app(app)
+
+    if _is_sqlite(uri):
+        pragmas = sqlite_pragmas()
+
+        with app.app_context():
+            @event.listens_for(db.engine, 'connect')
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+                cursor.close()
@@ -0,0 +1,285 @@
+"""
+Exercise Catalog
+Maps free-text exercise names to canonical catalog entries
+
+Incoming names are normalized (case, punctuation, spacing, plural "s") and
+looked up in an in-memory alias index that each worker loads once from the
+exercise_aliases table. Unknown names fall through to an indexed alias query
+(another worker may have added them) and are otherwise added to the catalog
+as new exercises, so every workout gets an exercise_id.
+
+New entries are written in the caller's transaction and only enter the
+shared index after it commits, so a rolled-back request can never leave a
+dangling id cached in the worker.
+
+init_schema adds the workouts.exercise_id column, seeds the catalog and
+backfills existing rows at startup; `flask --app app migrate-exercises` does
+the same on demand.
+"""
+import json
+import re
+import threading
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, insert, inspect, select, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from models import db, Exercise, ExerciseAlias, Workout, ArchivedWorkout
+
+# Canonical name, extra spellings, muscle groups. Names match the rule engine's suggestions.
+CATALOG = [
+    ('Squats', ['air squat', 'bodyweight squat', 'back squat', 'front squat', 'goblet squat'], ['quads', 'glutes', 'hamstrings']),
+    ('Push-ups', ['pushup', 'press up', 'press-up'], ['chest', 'triceps', 'shoulders']),
+    ('Plank', ['forearm plank', 'plank hold'], ['core']),
+    ('Lunges', ['walking lunge', 'reverse lunge', 'forward lunge'], ['quads', 'glutes']),
+    ('Burpees', [], ['full body', 'cardio']),
+    ('Mountain Climbers', ['mountain climber'], ['core', 'cardio']),
+    ('Romanian Deadlifts', ['rdl', 'romanian deadlift'], ['hamstrings', 'glutes', 'lower back']),
+    ('Deadlifts', ['conventional deadlift'], ['hamstrings', 'glutes', 'lower back']),
+    ('Pull-ups', ['pullup', 'chin up', 'chinup', 'chin-up'], ['back', 'biceps']),
+    ('Rows', ['row', 'bent over row', 'dumbbell row', 'inverted row'], ['back', 'biceps']),
+    ('Dips', ['tricep dip', 'triceps dip', 'bench dip'], ['triceps', 'chest']),
+    ('Jumping Jacks', ['jumping jack', 'star jump'], ['cardio']),
+    ('Sit-ups', ['situp', 'sit up'], ['core']),
+    ('Crunches', ['crunch'], ['core']),
+    ('Glute Bridges', ['glute bridge', 'hip bridge'], ['glutes', 'hamstrings']),
+    ('Bench Press', ['bench'], ['chest', 'triceps', 'shoulders']),
+]
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_key(name):
+    """Lowercase, punctuation- and plural-insensitive key: 'Push-Ups ' -> 'push up'"""
+    key = _NON_WORD.sub(' ', (name or '').lower()).strip()
+    if len(key) > 3 and key.endswith('s') and not key.endswith('ss'):
+        key = key[:-1]
+    return key[:100]
+
+
+class ExerciseIndex:
+    """Per-process alias -> exercise_id map plus id -> (name, muscle groups)"""
+
+    def __init__(self):
+        self.aliases = {}
+        self.exercises = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the whole catalog once (a few hundred rows at most)"""
+        with self._lock:
+            if self.loaded:
+                return
+            for exercise in db.session.execute(select(Exercise)).scalars():
+                self.exercises[exercise.id] = (exercise.name, exercise.to_dict()['muscle_groups'])
+            for alias, exercise_id in db.session.execute(select(ExerciseAlias.alias, ExerciseAlias.exercise_id)):
+                self.aliases[alias] = exercise_id
+            self.loaded = True
+
+    def remember(self, exercise_id, name, muscles, key):
+        with self._lock:
+            self.exercises[exercise_id] = (name, muscles)
+            self.aliases[key] = exercise_id
+
+    def lookup(self, name):
+        """exercise_id for a name from the in-memory index only, or None"""
+        if not self.loaded:
+            self.load()
+        return self.aliases.get(normalize_key(name))
+
+    def info(self, exercise_id):
+        """(name, muscle groups) for a catalog id, or None"""
+        if not self.loaded:
+            self.load()
+        return self.exercises.get(exercise_id)
+
+    def clear(self):
+        with self._lock:
+            self.aliases.clear()
+            self.exercises.clear()
+            self.loaded = False
+
+
+_index = ExerciseIndex()
+
+
+def _pending(session):
+    """Exercises created in the session's open transaction: {key: (exercise_id, name)}"""
+    return session.info.setdefault('pending_exercises', {})
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    for key, (exercise_id, name) in session.info.pop('pending_exercises', {}).items():
+        _index.remember(exercise_id, name, [], key)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session):
+    session.info.pop('pending_exercises', None)
+
+
+def _insert_ignore(table):
+    """INSERT that skips rows violating a unique constraint (SQLite / PostgreSQL)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql_insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def resolve_exercise_id(name):
+    """
+    exercise_id for a free-text name, adding it to the catalog if it is new
+    Uses the current session; a new entry is committed with the caller's transaction
+    """
+    exercise_id = _index.lookup(name)
+    if exercise_id is not None:
+        return exercise_id
+
+    session = db.session()
+    pending = _pending(session)
+    key = normalize_key(name)
+
+    # Created earlier in this (uncommitted) transaction
+    if key in pending:
+        return pending[key][0]
+
+    # Added by another worker since this index was loaded?
+    found = session.execute(
+        select(Exercise).join(ExerciseAlias, ExerciseAlias.exercise_id == Exercise.id).where(ExerciseAlias.alias == key)
+    ).scalar()
+    if found is not None:
+        _index.remember(found.id, found.name, found.to_dict()['muscle_groups'], key)
+        return found.id
+
+    # Conflict-tolerant inserts in the caller's transaction: a concurrent worker adding
+    # the same name wins quietly, and a rollback removes the entry again
+    display_name = name.strip()[:100]
+    session.execute(_insert_ignore(Exercise.__table__).values(name=display_name, created_at=datetime.utcnow()))
+    exercise_id = session.execute(select(Exercise.id).where(Exercise.name == display_name)).scalar_one()
+    session.execute(_insert_ignore(ExerciseAlias.__table__).values(alias=key, exercise_id=exercise_id))
+    exercise_id = session.execute(select(ExerciseAlias.exercise_id).where(ExerciseAlias.alias == key)).scalar_one()
+
+    pending[key] = (exercise_id, display_name)
+    return exercise_id
+
+
+def exercise_name(exercise_id, fallback=None):
+    """Canonical name for a catalog id (fallback when unknown or None)"""
+    info = _index.info(exercise_id) if exercise_id is not None else None
+    return info[0] if info else fallback
+
+
+def canonical_exercise(name):
+    """(exercise_id, canonical name, muscle groups) for a free-text name without creating entries"""
+    exercise_id = _index.lookup(name)
+    if exercise_id is None:
+        return None, name, []
+    canonical, muscles = _index.info(exercise_id)
+    return exercise_id, canonical, muscles
+
+
+def ensure_schema():
+    """
+    Add workouts.exercise_id to databases created before the catalog existed, and
+    any workouts indexes added since the table was created (create_all skips
+    existing tables)
+    """
+    db.create_all()
+    columns = {column['name'] for column in inspect(db.engine).get_columns('workouts')}
+    if 'exercise_id' not in columns:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text('ALTER TABLE workouts ADD COLUMN exercise_id INTEGER REFERENCES exercises (id)'))
+        except DBAPIError:
+            # Another worker added it first
+            columns = {column['name'] for column in inspect(db.engine).get_columns('workouts')}
+            if 'exercise_id' not in columns:
+                raise
+    # e.g. ix_workouts_user_timestamp_id (keyset pagination), ix_workouts_user_exercise_id
+    for index in Workout.__table__.indexes:
+        try:
+            index.create(db.engine, checkfirst=True)
+        except DBAPIError:
+            pass  # created concurrently by another worker
+
+
+def seed_catalog():
+    """Insert missing CATALOG entries and aliases; returns the number of exercises added"""
+    existing = {name: exercise_id for exercise_id, name in db.session.execute(select(Exercise.id, Exercise.name))}
+    known_aliases = set(db.session.execute(select(ExerciseAlias.alias)).scalars())
+    added = 0
+    for name, aliases, muscles in CATALOG:
+        exercise_id = existing.get(name)
+        if exercise_id is None:
+            exercise = Exercise(name=name, muscle_groups=json.dumps(muscles))
+            db.session.add(exercise)
+            db.session.flush()
+            exercise_id = exercise.id
+            added += 1
+        for alias in [name] + aliases:
+            key = normalize_key(alias)
+            if key not in known_aliases:
+                db.session.add(ExerciseAlias(alias=key, exercise_id=exercise_id))
+                known_aliases.add(key)
+    db.session.commit()
+    _index.clear()
+    return added
+
+
+def init_catalog():
+    """Startup hook: schema upgrade and catalog seed, tolerant of workers racing each other"""
+    ensure_schema()
+    try:
+        seed_catalog()
+    except IntegrityError:
+        db.session.rollback()
+        _index.clear()
+
+
+def backfill_workouts(batch_size=5000):
+    """
+    Set exercise_id on workouts (hot and archived) that predate the catalog
+    Returns the number of rows updated
+    """
+    updated = 0
+    for model in (Workout, ArchivedWorkout):
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.exercise)
+                .where(model.exercise_id.is_(None), model.id > last_id)
+                .order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            resolved = {}
+            params = []
+            for workout_id, name in rows:
+                if name not in resolved:
+                    resolved[name] = resolve_exercise_id(name)
+                params.append({'id': workout_id, 'exercise_id': resolved[name]})
+            db.session.execute(update(model), params)
+            db.session.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+    return updated
+
+
+@click.command('migrate-exercises')
+@click.option('--batch-size', type=int, default=5000, show_default=True)
+@with_appcontext
+def migrate_exercises_command(batch_size):
+    """Add the exercise catalog to an existing database and backfill workouts.exercise_id"""
+    ensure_schema()
+    added = seed_catalog()
+    updated = backfill_workouts(batch_size)
+    click.echo(f'Catalog: {added} exercises added; backfilled {updated} workouts')
@@ -0,0 +1,96 @@
+"""
+Workout Export
+Streaming CSV / NDJSON serialization of a user's full workout history
+
+Rows are read as plain column tuples through a server-side cursor
+(yield_per) and encoded in small batches by a generator, so peak memory does
+not depend on how much history the user has. The hot and archived tiers are
+read as two ordered streams and merged. Rows are emitted oldest first;
+a client that is interrupted can resume with the timestamp and id of the last
+row it received.
+"""
+import csv
+import heapq
+import io
+import json
+import os
+
+from sqlalchemy import select, and_, or_
+
+from models import db
+from archive import TIERS
+
+EXPORT_COLUMNS = ('id', 'exercise', 'sets', 'reps', 'duration', 'completed', 'timestamp')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _batch_size():
+    return int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+
+def export_rows(user_id, after=None):
+    """
+    Yield export tuples for a user in (timestamp, id) order
+    after: optional (timestamp, id) resume position; only later rows are returned
+    """
+    streams = []
+    for model in TIERS:
+        columns = [getattr(model, name) for name in EXPORT_COLUMNS]
+        query = select(*columns).where(model.user_id == user_id)
+        if after is not None:
+            timestamp, workout_id = after
+            query = query.where(or_(
+                model.timestamp > timestamp,
+                and_(model.timestamp == timestamp, model.id > workout_id)
+            ))
+        query = query.order_by(model.timestamp, model.id).execution_options(yield_per=_batch_size())
+        streams.append(db.session.execute(query))
+
+    yield from heapq.merge(*streams, key=lambda row: (row.timestamp, row.id))
+
+
+def _format(row):
+    """Tuple with the timestamp rendered as ISO 8601"""
+    timestamp = row[-1]
+    return row[:-1] + (timestamp.isoformat() if timestamp else None,)
+
+
+def stream_csv(rows):
+    """Generator of CSV text chunks (header first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    batch_size = _batch_size()
+    for row in rows:
+        writer.writerow(_format(row))
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    """Generator of NDJSON text chunks, one object per line"""
+    lines = []
+    batch_size = _batch_size()
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, _format(row)))))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration
+Loaded automatically by `gunicorn app:app` from the backend directory
+"""
+import os
+import shutil
+import tempfile
+
+# Threads per worker (gthread), so requests waiting on the password hasher pool
+# or other I/O don't hold the whole worker
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app once in the master and fork workers from it: imports happen
+# once, and the schema is set up (on_starting) before any worker exists
+preload_app = True
+
+# Workers write metric snapshots here so /api/metrics can aggregate them
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'fitlog-metrics-{os.getpid()}'))
+
+
+def on_starting(server):
+    """Start every deployment with empty metrics and an up-to-date schema"""
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    # SCHEMA_INIT=false when a release step runs `flask --app app init-db` instead
+    if os.environ.get('SCHEMA_INIT', 'true').lower() in ('1', 'true', 'yes'):
+        from app import app, init_schema
+        init_schema(app)
+
+
+def on_exit(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
@@ -0,0 +1,234 @@
+"""
+Metrics
+Request timing middleware and Prometheus text exposition at /api/metrics
+
+Records per-endpoint latency histograms, status-code counters, SQL query
+count/time per request (SQLAlchemy cursor events) and upstream xAI timings.
+
+Each gunicorn worker keeps its own registry. When METRICS_DIR is set, a
+background thread in every worker writes a snapshot to METRICS_DIR/<pid>.json
+and a scrape sums the snapshots of all workers, so counters and histograms are
+aggregated across processes regardless of which worker answers. gunicorn.conf.py points
+METRICS_DIR at a fresh directory on startup.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import Blueprint, Response, g, has_request_context, request
+from sqlalchemy import event
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+HELP = {
+    'fitlog_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'fitlog_http_requests_total': ('counter', 'HTTP requests by endpoint and status code'),
+    'fitlog_db_queries_total': ('counter', 'SQL statements executed by endpoint'),
+    'fitlog_db_query_seconds_total': ('counter', 'Time spent in SQL statements by endpoint'),
+    'fitlog_request_db_seconds': ('histogram', 'Total SQL time per request by endpoint'),
+    'fitlog_xai_request_duration_seconds': ('histogram', 'Upstream xAI request latency'),
+    'fitlog_xai_events_total': ('counter', 'xAI suggestion events (fallbacks, cache hits, breaker...)'),
+}
+
+
+class Registry:
+    """Thread-safe counters and fixed-bucket histograms keyed by (name, labels)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name, labels=None, amount=1.0):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name, value, labels=None):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                hist = self.histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    def snapshot(self):
+        """JSON-serializable copy of all values"""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [[name, list(map(list, labels)), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), list(hist)] for (name, labels), hist in self.histograms.items()],
+            }
+
+
+registry = Registry()
+
+
+def merge_snapshots(snapshots):
+    """Sum several registry snapshots into one"""
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, hist in snap['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            current = histograms.get(key)
+            histograms[key] = list(hist) if current is None else [a + b for a, b in zip(current, hist)]
+    return counters, histograms
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = ['{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs]
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus(counters, histograms, buckets=DEFAULT_BUCKETS):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        kind, help_text = HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        for (metric, labels), hist in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, hist):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", f"{bound:g}")])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {hist[-2]:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {hist[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _metrics_dir():
+    return os.environ.get('METRICS_DIR')
+
+
+def flush():
+    """Write this worker's snapshot to METRICS_DIR/<pid>.json"""
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def ensure_flusher():
+    """Start one background flusher per worker process (after gunicorn forks)"""
+    global _flusher_pid
+    if not _metrics_dir() or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        interval = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+        threading.Thread(target=_flush_loop, args=(interval,), name='metrics-flush', daemon=True).start()
+
+
+def collect():
+    """Aggregate metrics of all workers (or just this process without METRICS_DIR)"""
+    directory = _metrics_dir()
+    if not directory:
+        return merge_snapshots([registry.snapshot()])
+    flush()
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merge_snapshots(snapshots)
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    counters, histograms = collect()
+    return Response(render_prometheus(counters, histograms), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app, db):
+    """Register timing hooks on the app and SQL hooks on its engine"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method}
+        registry.observe('fitlog_http_request_duration_seconds', time.perf_counter() - start, labels)
+        registry.inc('fitlog_http_requests_total', {**labels, 'status': str(response.status_code)})
+        if g.db_queries:
+            registry.inc('fitlog_db_queries_total', {'endpoint': endpoint}, g.db_queries)
+            registry.inc('fitlog_db_query_seconds_total', {'endpoint': endpoint}, g.db_seconds)
+        registry.observe('fitlog_request_db_seconds', g.db_seconds, {'endpoint': endpoint})
+        ensure_flusher()
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # Kept on the execution context, so a statement that raises leaves nothing behind
+            context._query_start = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and 'db_queries' in g:
+                g.db_queries += 1
+                g.db_seconds += time.perf_counter() - context._query_start
@@ -3,11 +3,21 @@ Database Models
 SQLAlchemy models for User and Workout tables
 
 User table: id, username, email, password_hash, created_at
-Workout table: id, user_id, exercise, sets, reps, duration, completed, timestamp
+Exercise table: id, name, muscle_groups, created_at
+ExerciseAlias table: alias (normalized spelling), exercise_id
+Workout table: id, user_id, exercise, exercise_id, sets, reps, duration, completed, timestamp
+ArchivedWorkout table: same columns, workouts moved out of the hot table by `flask archive-workouts`
+WorkoutChange table: id (change version), user_id, workout_id, op, created_at
+WorkoutDailyStat table: (user_id, day, exercise_id) rollup of workout totals
+PersonalRecord table: (user_id, exercise_id) best reps, volume and duration
+Suggestion table: id, user_id, workout_id, status, payload, created_at, completed_at
+PrecomputedSuggestion table: user_id, version, payload, created_at
+RevokedToken table: jti, expires_at
 """
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password, needs_rehash
 from datetime import datetime
+import json
 
 # db instance - will be initialized in app.py using init_app()
 db = SQLAlchemy()
@@ -29,12 +39,16 @@ class User(db.Model):
     workouts = db.relationship('Workout', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        """Hash and store password securely"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and store password securely (in the hasher pool, see passwords.py)"""
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verify password against hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash uses outdated hash parameters"""
+        return needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert user to dictionary (without password)"""
@@ -45,32 +59,223 @@ class User(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class Exercise(db.Model):
+    """
+    Exercise Model
+    Canonical exercise catalog entry with muscle-group tags
+    Free-text exercise names are mapped to an entry through exercise_aliases
+    """
+    __tablename__ = 'exercises'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    muscle_groups = db.Column(db.Text, nullable=True)  # JSON-encoded list of tags
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert exercise to dictionary for JSON response"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'muscle_groups': json.loads(self.muscle_groups) if self.muscle_groups else []
+        }
+
+class ExerciseAlias(db.Model):
+    """
+    ExerciseAlias Model
+    Normalized spelling (see exercises.normalize_key) -> catalog exercise
+    """
+    __tablename__ = 'exercise_aliases'
+    
+    alias = db.Column(db.String(100), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False, index=True)
+
 class Workout(db.Model):
     """
     Workout Model
     Stores individual workout logs with exercise details
-    Fields: id, user_id, exercise, sets, reps, duration, completed, timestamp
+    Fields: id, user_id, exercise, exercise_id, sets, reps, duration, completed, timestamp
+    exercise keeps the name as entered; exercise_id points at the catalog entry
     """
     __tablename__ = 'workouts'
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     exercise = db.Column(db.String(100), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=True)
     sets = db.Column(db.Integer, default=1)
     reps = db.Column(db.Integer, default=0)
     duration = db.Column(db.Integer, default=0)  # Duration in seconds
     completed = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Composite index backing keyset pagination: a page is one range scan
+    # regardless of how much history the user has. AUTOINCREMENT keeps SQLite
+    # from reusing the ids of rows moved to workouts_archive
+    __table_args__ = (
+        db.Index('ix_workouts_user_timestamp_id', 'user_id', timestamp.desc(), id.desc()),
+        db.Index('ix_workouts_user_exercise_id', 'user_id', 'exercise_id'),
+        {'sqlite_autoincrement': True},
+    )
+    
     def to_dict(self):
         """Convert workout to dictionary for JSON response"""
         return {
             'id': self.id,
             'user_id': self.user_id,
             'exercise': self.exercise,
+            'exercise_id': self.exercise_id,
             'sets': self.sets,
             'reps': self.reps,
             'duration': self.duration,
             'completed': self.completed,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
+
+class ArchivedWorkout(db.Model):
+    """
+    ArchivedWorkout Model
+    Cold tier of the workouts table: rows older than the archive horizon, moved
+    here unchanged (same id) by `flask archive-workouts`; see archive.py
+    """
+    __tablename__ = 'workouts_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    exercise = db.Column(db.String(100), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=True)
+    sets = db.Column(db.Integer, default=1)
+    reps = db.Column(db.Integer, default=0)
+    duration = db.Column(db.Integer, default=0)
+    completed = db.Column(db.Boolean, default=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    
+    # Only read-through pagination and per-user lookups touch the archive
+    __table_args__ = (
+        db.Index('ix_workouts_archive_user_timestamp_id', 'user_id', timestamp.desc(), id.desc()),
+    )
+    
+    to_dict = Workout.to_dict
+
+class WorkoutChange(db.Model):
+    """
+    WorkoutChange Model
+    Append-only change log used for incremental client sync
+    The autoincrement id doubles as a monotonically increasing change version;
+    op is 'upsert' for inserted/updated workouts and 'delete' for tombstones
+    """
+    __tablename__ = 'workout_changes'
+    
+    OP_UPSERT = 'upsert'
+    OP_DELETE = 'delete'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    workout_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_workout_changes_user_id_id', 'user_id', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    @classmethod
+    def latest_version(cls, user_id):
+        """Return the user's current change version (0 if nothing recorded yet)"""
+        return db.session.query(db.func.max(cls.id)).filter(cls.user_id == user_id).scalar() or 0
+
+class WorkoutDailyStat(db.Model):
+    """
+    WorkoutDailyStat Model
+    Pre-aggregated per-user, per-day, per-catalog-exercise totals for the stats
+    endpoint; spellings of one exercise share a row
+    Maintained incrementally by the workout write endpoints; rebuildable in bulk
+    with `flask rebuild-stats`
+    """
+    __tablename__ = 'workout_daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), primary_key=True)
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    total_sets = db.Column(db.Integer, nullable=False, default=0)
+    total_reps = db.Column(db.Integer, nullable=False, default=0)
+    total_volume = db.Column(db.Integer, nullable=False, default=0)  # Sum of sets x reps
+    total_duration = db.Column(db.Integer, nullable=False, default=0)  # Seconds
+
+class PersonalRecord(db.Model):
+    """
+    PersonalRecord Model
+    Per-user, per-catalog-exercise bests (max reps, max sets x reps volume,
+    longest duration), each with the workout that set it and when
+    Maintained by the workout write endpoints; rebuildable with `flask rebuild-stats`
+    """
+    __tablename__ = 'personal_records'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), primary_key=True)
+    max_reps = db.Column(db.Integer, nullable=True)
+    max_reps_workout_id = db.Column(db.Integer, nullable=True)
+    max_reps_at = db.Column(db.DateTime, nullable=True)
+    max_volume = db.Column(db.Integer, nullable=True)
+    max_volume_workout_id = db.Column(db.Integer, nullable=True)
+    max_volume_at = db.Column(db.DateTime, nullable=True)
+    max_duration = db.Column(db.Integer, nullable=True)  # Seconds
+    max_duration_workout_id = db.Column(db.Integer, nullable=True)
+    max_duration_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Suggestion(db.Model):
+    """
+    Suggestion Model
+    AI suggestion generated in the background after a workout is logged
+    status moves from 'pending' to 'ready' (or 'failed'); payload holds the
+    suggestion dict as JSON once ready
+    """
+    __tablename__ = 'suggestions'
+    
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    workout_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(10), nullable=False, default=STATUS_PENDING)
+    payload = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert suggestion job to dictionary for JSON response"""
+        return {
+            'suggestion_id': self.id,
+            'status': self.status,
+            'suggestion': json.loads(self.payload) if self.payload else None
+        }
+
+class PrecomputedSuggestion(db.Model):
+    """
+    PrecomputedSuggestion Model
+    Latest suggestion per user, built ahead of time by `flask precompute-suggestions`
+    Valid only while version equals the user's current change version
+    """
+    __tablename__ = 'precomputed_suggestions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class RevokedToken(db.Model):
+    """
+    RevokedToken Model
+    JWT ids revoked by logout; rows are only meaningful until the token's own
+    expiry and are purged after it
+    """
+    __tablename__ = 'revoked_tokens'
+    
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,118 @@
+"""
+Password Hashing
+Runs Werkzeug password hashing in a bounded process pool
+
+scrypt/pbkdf2 are CPU-bound by design, so a burst of logins hashed on the
+request threads competes for CPU with every other endpoint. Hashes are instead
+computed by a small per-process pool of hasher processes, and callers beyond
+the pool plus a short queue are rejected with PasswordHasherBusy (the auth
+endpoints answer 503) instead of piling up.
+
+Environment:
+  - PASSWORD_HASH_METHOD (optional): Werkzeug method string, default scrypt
+    (e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000)
+  - PASSWORD_HASH_SALT_LENGTH (optional): salt length, default 16
+  - PASSWORD_HASH_WORKERS (optional): hasher processes per worker, default 1;
+    0 hashes inline on the request thread
+  - PASSWORD_HASH_QUEUE_SIZE (optional): hashes allowed to wait for a process, default 8
+  - PASSWORD_HASH_WAIT (optional): seconds to wait for a queue slot, default 2
+  - PASSWORD_HASH_NICE (optional): niceness added to hasher processes, default 10,
+    so request handling wins the CPU when both are runnable
+
+Stored hashes made with other parameters still verify; needs_rehash() tells
+login to upgrade them with the current parameters.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when every hasher process is busy and the queue is full"""
+
+
+def hash_method():
+    return os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+
+def salt_length():
+    return int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16))
+
+
+def _canonical_method(method):
+    """Expand defaults so 'scrypt' compares equal to the stored 'scrypt:32768:8:1'"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    args = args + defaults[len(args):]
+    return ':'.join([name] + args)
+
+
+def needs_rehash(stored_hash):
+    """Whether a stored hash was made with different parameters than the current ones"""
+    stored_method, _, rest = stored_hash.partition('$')
+    salt = rest.partition('$')[0]
+    return _canonical_method(stored_method) != _canonical_method(hash_method()) or len(salt) != salt_length()
+
+
+def _get_executor():
+    """Create the hasher pool on first use (after gunicorn forks); None means inline"""
+    global _executor, _slots
+    with _lock:
+        if _slots is None:
+            workers = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+            queue_size = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 8))
+            if workers > 0:
+                niceness = int(os.environ.get('PASSWORD_HASH_NICE', 10))
+                _executor = ProcessPoolExecutor(max_workers=workers, initializer=os.nice, initargs=(niceness,))
+                _slots = threading.BoundedSemaphore(workers + queue_size)
+            else:
+                _slots = threading.BoundedSemaphore(max(queue_size, 1))
+    return _executor, _slots
+
+
+def _reset_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
+
+
+def _run(fn, *args):
+    executor, slots = _get_executor()
+    if not slots.acquire(timeout=float(os.environ.get('PASSWORD_HASH_WAIT', 2))):
+        raise PasswordHasherBusy('Too many concurrent password hashes')
+    try:
+        if executor is None:
+            return fn(*args)
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A hasher process died; start a fresh pool next time and hash inline now
+            _reset_executor()
+            return fn(*args)
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    """Hash a password with the configured parameters"""
+    return _run(generate_password_hash, password, hash_method(), salt_length())
+
+
+def verify_password(stored_hash, password):
+    """Check a password against a stored hash (any supported method)"""
+    return _run(check_password_hash, stored_hash, password)
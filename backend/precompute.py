@@ -0,0 +1,140 @@
+"""
+Suggestion Precompute
+Builds next-workout suggestions for recently active users ahead of time
+
+`flask --app app precompute-suggestions` (e.g. from cron before the morning
+peak) finds users with workouts in the last --active-days, skips users whose
+stored suggestion is still current, and loads the recent history of a whole
+batch of users with one ROW_NUMBER() window query instead of one query per
+user. Suggestions are generated on a bounded thread pool, so at most
+--concurrency upstream xAI calls are in flight, and upserted into
+precomputed_suggestions together with the change version they were built
+from. GET /api/workouts/suggestion then serves them with one primary-key
+lookup; logging a workout deletes the user's entry, and any other write makes
+it stale through the version check.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select
+
+from models import db, Workout, WorkoutChange, PrecomputedSuggestion
+from ai_suggestions import get_next_suggestion
+from exercises import exercise_name
+from serialization import WORKOUT_FIELDS
+from records import prompt_summaries
+
+# Same history length as create_workout and get_latest_suggestion
+HISTORY_SIZE = 5
+
+
+def get_precomputed(user_id, version):
+    """Stored suggestion dict if it was built from the given version, else None"""
+    row = db.session.get(PrecomputedSuggestion, user_id)
+    if row is None or row.version != version:
+        return None
+    return json.loads(row.payload)
+
+
+def invalidate_precomputed(user_id):
+    """Drop a user's stored suggestion in the current transaction (committed by the caller)"""
+    db.session.execute(delete(PrecomputedSuggestion).where(PrecomputedSuggestion.user_id == user_id))
+
+
+def active_users_needing_refresh(since):
+    """[(user_id, version)] for users with workouts since `since` and no current precomputed entry"""
+    active = select(Workout.user_id).where(Workout.timestamp >= since).group_by(Workout.user_id).subquery()
+    versions = (
+        select(WorkoutChange.user_id, func.max(WorkoutChange.id).label('version'))
+        .where(WorkoutChange.user_id.in_(select(active.c.user_id)))
+        .group_by(WorkoutChange.user_id)
+        .subquery()
+    )
+    version = func.coalesce(versions.c.version, 0)
+    query = (
+        select(active.c.user_id, version)
+        .outerjoin(versions, versions.c.user_id == active.c.user_id)
+        .outerjoin(PrecomputedSuggestion, PrecomputedSuggestion.user_id == active.c.user_id)
+        .where((PrecomputedSuggestion.version.is_(None)) | (PrecomputedSuggestion.version != version))
+        .order_by(active.c.user_id)
+    )
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def recent_histories(user_ids, size=HISTORY_SIZE):
+    """{user_id: [workout dicts, most recent first]} for many users in one window query"""
+    columns = [getattr(Workout, name) for name in WORKOUT_FIELDS]
+    rank = func.row_number().over(
+        partition_by=Workout.user_id,
+        order_by=(Workout.timestamp.desc(), Workout.id.desc())
+    ).label('rank')
+    ranked = select(*columns, rank).where(Workout.user_id.in_(user_ids)).subquery()
+    query = select(*[ranked.c[name] for name in WORKOUT_FIELDS]).where(ranked.c.rank <= size).order_by(
+        ranked.c.user_id, ranked.c.rank
+    )
+
+    histories = {}
+    for row in db.session.execute(query):
+        workout = dict(zip(WORKOUT_FIELDS, row))
+        workout['timestamp'] = workout['timestamp'].isoformat() if workout['timestamp'] else None
+        histories.setdefault(workout['user_id'], []).append(workout)
+    return histories
+
+
+def precompute_batch(pending, concurrency):
+    """Generate and store suggestions for [(user_id, version)]; returns the number stored"""
+    histories = recent_histories([user_id for user_id, _ in pending])
+    pending = [(user_id, version) for user_id, version in pending if user_id in histories]
+    if not pending:
+        return 0
+    summaries = prompt_summaries({user_id: histories[user_id] for user_id, _ in pending})
+    jobs = [
+        (
+            exercise_name(histories[user_id][0]['exercise_id'], histories[user_id][0]['exercise']),
+            histories[user_id],
+            summaries.get(user_id)
+        )
+        for user_id, _ in pending
+    ]
+    db.session.rollback()  # don't hold a connection while upstream calls run
+
+    # Upstream calls only; no database access on the pool threads
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='precompute') as pool:
+        suggestions = list(pool.map(lambda job: get_next_suggestion(job[0], recent_workouts=job[1], records=job[2]), jobs))
+
+    now = datetime.utcnow()
+    user_ids = [user_id for user_id, _ in pending]
+    db.session.execute(delete(PrecomputedSuggestion).where(PrecomputedSuggestion.user_id.in_(user_ids)))
+    db.session.execute(insert(PrecomputedSuggestion), [
+        {'user_id': user_id, 'version': version, 'payload': json.dumps(suggestion), 'created_at': now}
+        for (user_id, version), suggestion in zip(pending, suggestions)
+    ])
+    db.session.commit()
+    return len(pending)
+
+
+def precompute_suggestions(active_days=1, concurrency=4, batch_size=200):
+    """Refresh stale suggestions of all recently active users; returns (users considered, stored)"""
+    since = datetime.utcnow() - timedelta(days=active_days)
+    pending = active_users_needing_refresh(since)
+
+    stored = 0
+    for start in range(0, len(pending), batch_size):
+        stored += precompute_batch(pending[start:start + batch_size], concurrency)
+    return len(pending), stored
+
+
+@click.command('precompute-suggestions')
+@click.option('--active-days', type=float, default=1, show_default=True, help='Users with workouts in this window')
+@click.option('--concurrency', type=int, default=4, show_default=True, help='Parallel suggestion (xAI) calls')
+@click.option('--batch-size', type=int, default=200, show_default=True, help='Users per history query')
+@with_appcontext
+def precompute_suggestions_command(active_days, concurrency, batch_size):
+    """Precompute suggestions for recently active users"""
+    started = time.perf_counter()
+    considered, stored = precompute_suggestions(active_days, concurrency, batch_size)
+    click.echo(f'Precomputed {stored} of {considered} stale suggestions in {time.perf_counter() - started:.2f}s')
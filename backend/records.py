@@ -0,0 +1,286 @@
+"""
+Personal Records
+Per-exercise bests and weekly trends for GET /api/workouts/records and the xAI prompt
+
+personal_records holds one row per user and catalog exercise with the best
+reps, volume (sets x reps) and duration and the workout that set each. A new
+workout is compared against that row with one primary-key lookup; deleting a
+workout only triggers a recomputation (both tiers, that exercise only) when it
+held one of the records. The earliest workout keeps a record on ties.
+
+Trends come from the daily stats rollup (one row per day and exercise), so
+they never scan workouts either.
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, select
+
+from models import db, Exercise, PersonalRecord, WorkoutDailyStat
+from archive import all_workouts_table
+
+METRICS = ('reps', 'volume', 'duration')
+
+# Weeks of history behind a trend line
+DEFAULT_TREND_WEEKS = 8
+
+
+def _metric_values(workout):
+    """{metric: value} for a workout object or row mapping"""
+    sets, reps = workout['sets'] or 0, workout['reps'] or 0
+    return {'reps': reps, 'volume': sets * reps, 'duration': workout['duration'] or 0}
+
+
+def _workout_fields(workout):
+    return {name: getattr(workout, name) for name in ('id', 'sets', 'reps', 'duration', 'timestamp')}
+
+
+def _holder_columns():
+    return [getattr(PersonalRecord, f'max_{metric}_workout_id') for metric in METRICS]
+
+
+def apply_workout(workout):
+    """
+    Fold a newly created workout into its exercise's records (O(1), one primary-key lookup)
+    Must be called after the workout is flushed so its id and timestamp are populated
+    """
+    if workout.exercise_id is None:
+        return
+    record = db.session.get(PersonalRecord, (workout.user_id, workout.exercise_id))
+    if record is None:
+        record = PersonalRecord(user_id=workout.user_id, exercise_id=workout.exercise_id)
+        db.session.add(record)
+
+    fields = _workout_fields(workout)
+    for metric, value in _metric_values(fields).items():
+        current = getattr(record, f'max_{metric}')
+        if value > 0 and (current is None or value > current):
+            setattr(record, f'max_{metric}', value)
+            setattr(record, f'max_{metric}_workout_id', workout.id)
+            setattr(record, f'max_{metric}_at', workout.timestamp)
+
+
+def recompute(user_id, exercise_ids):
+    """Recompute the records of some of a user's exercises from both workout tiers"""
+    for exercise_id in set(exercise_ids):
+        if exercise_id is None:
+            continue
+        workouts = all_workouts_table(user_id=user_id, exercise_id=exercise_id).c
+        values = {
+            'reps': workouts.reps,
+            'volume': workouts.sets * workouts.reps,
+            'duration': workouts.duration,
+        }
+        best = {}
+        for metric, value in values.items():
+            best[metric] = db.session.execute(
+                select(workouts.id, value, workouts.timestamp)
+                .where(value > 0)
+                .order_by(value.desc(), workouts.timestamp, workouts.id)
+                .limit(1)
+            ).first()
+
+        record = db.session.get(PersonalRecord, (user_id, exercise_id))
+        if not any(best.values()):
+            if record is not None:
+                db.session.delete(record)
+            continue
+        if record is None:
+            record = PersonalRecord(user_id=user_id, exercise_id=exercise_id)
+            db.session.add(record)
+        for metric, row in best.items():
+            workout_id, value, timestamp = row if row else (None, None, None)
+            setattr(record, f'max_{metric}', value)
+            setattr(record, f'max_{metric}_workout_id', workout_id)
+            setattr(record, f'max_{metric}_at', timestamp)
+
+
+def remove_workouts(user_id, workout_ids):
+    """
+    Call after deleting workouts (in the same transaction): recompute only the
+    exercises whose records were held by one of them
+    """
+    db.session.flush()
+    affected = db.session.execute(
+        select(PersonalRecord.exercise_id).where(
+            PersonalRecord.user_id == user_id,
+            or_(*[column.in_(workout_ids) for column in _holder_columns()])
+        )
+    ).scalars().all()
+    recompute(user_id, affected)
+
+
+def rebuild_records(user_id=None):
+    """
+    Recompute personal_records from scratch in one ordered pass over both tiers
+    Rebuilds every user unless user_id is given; returns the number of record rows
+    """
+    filters = {'user_id': user_id} if user_id is not None else {}
+    workouts = all_workouts_table(**filters).c
+    query = select(
+        workouts.user_id, workouts.exercise_id, workouts.id, workouts.sets,
+        workouts.reps, workouts.duration, workouts.timestamp
+    ).where(workouts.exercise_id.is_not(None)).order_by(workouts.timestamp, workouts.id)
+
+    # Oldest first with a strict comparison, so ties stay with the earliest workout
+    best = {}
+    for row in db.session.execute(query.execution_options(yield_per=5000)):
+        record = best.setdefault((row.user_id, row.exercise_id), {})
+        for metric, value in _metric_values(row._mapping).items():
+            if value > 0 and value > record.get(metric, (0,))[0]:
+                record[metric] = (value, row.id, row.timestamp)
+
+    stale = delete(PersonalRecord)
+    if user_id is not None:
+        stale = stale.where(PersonalRecord.user_id == user_id)
+    db.session.execute(stale)
+
+    now = datetime.utcnow()
+    rows = []
+    for (record_user_id, exercise_id), record in best.items():
+        row = {'user_id': record_user_id, 'exercise_id': exercise_id, 'updated_at': now}
+        for metric in METRICS:
+            value, workout_id, timestamp = record.get(metric, (None, None, None))
+            row.update({
+                f'max_{metric}': value, f'max_{metric}_workout_id': workout_id, f'max_{metric}_at': timestamp
+            })
+        rows.append(row)
+    if rows:
+        db.session.execute(PersonalRecord.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _slope(values):
+    """Least-squares slope of evenly spaced values"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = (n - 1) / 2, sum(values) / n
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(n))
+    return numerator / denominator
+
+
+def trends(user_ids, weeks=DEFAULT_TREND_WEEKS):
+    """
+    {user_id: {exercise_id: trend}} from the rollup over the last `weeks` weeks (Monday-based)
+    trend: metric (volume, or duration for timed exercises), weekly totals oldest
+    first, slope per week and direction (up / down / flat)
+    """
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks - 1)
+    rows = db.session.execute(
+        select(
+            WorkoutDailyStat.user_id, WorkoutDailyStat.day, WorkoutDailyStat.exercise_id,
+            WorkoutDailyStat.total_volume, WorkoutDailyStat.total_duration
+        ).where(
+            WorkoutDailyStat.user_id.in_(user_ids),
+            WorkoutDailyStat.day >= start,
+            # Future-dated workouts (e.g. imported) fall outside the window
+            WorkoutDailyStat.day < start + timedelta(weeks=weeks)
+        )
+    )
+
+    weekly = {}
+    for user_id, day, exercise_id, volume, duration in rows:
+        series = weekly.setdefault(user_id, {}).setdefault(exercise_id, {
+            'volume': [0] * weeks, 'duration': [0] * weeks
+        })
+        week = (day - start).days // 7
+        series['volume'][week] += volume
+        series['duration'][week] += duration
+
+    result = {}
+    for user_id, per_exercise in weekly.items():
+        for exercise_id, series in per_exercise.items():
+            metric = 'volume' if any(series['volume']) else 'duration'
+            values = series[metric]
+            slope = _slope(values)
+            mean = sum(values) / weeks
+            if abs(slope) <= 0.05 * mean:
+                direction = 'flat'
+            else:
+                direction = 'up' if slope > 0 else 'down'
+            result.setdefault(user_id, {})[exercise_id] = {
+                'metric': metric, 'weekly': values, 'slope': round(slope, 2), 'direction': direction
+            }
+    return result
+
+
+def _record_dict(record):
+    """Response shape of one record row"""
+    data = {}
+    for metric in METRICS:
+        value = getattr(record, f'max_{metric}')
+        achieved_at = getattr(record, f'max_{metric}_at')
+        data[f'max_{metric}'] = None if value is None else {
+            'value': value,
+            'workout_id': getattr(record, f'max_{metric}_workout_id'),
+            'achieved_at': achieved_at.isoformat() if achieved_at else None
+        }
+    return data
+
+
+def summarize(user_id, weeks=DEFAULT_TREND_WEEKS):
+    """Records and trend lines of every exercise the user has a record for, by exercise name"""
+    # Names come from the catalog table: this worker's alias index may not know
+    # exercises another worker created
+    rows = db.session.execute(
+        select(PersonalRecord, Exercise)
+        .join(Exercise, Exercise.id == PersonalRecord.exercise_id)
+        .where(PersonalRecord.user_id == user_id)
+    ).all()
+    user_trends = trends([user_id], weeks).get(user_id, {})
+    entries = []
+    for record, exercise in rows:
+        entries.append(dict(
+            exercise_id=record.exercise_id, exercise=exercise.name,
+            muscle_groups=exercise.to_dict()['muscle_groups'],
+            trend=user_trends.get(record.exercise_id), **_record_dict(record)
+        ))
+    return sorted(entries, key=lambda entry: entry['exercise'].lower())
+
+
+def prompt_summaries(histories, weeks=DEFAULT_TREND_WEEKS):
+    """
+    {user_id: compact records/trends of the exercises in each user's recent history}
+    for the xAI prompt; histories is {user_id: [workout dicts]}. Empty when xAI is
+    not configured, so rule-based suggestions cost no extra queries.
+    """
+    if not os.environ.get('XAI_API_KEY') or not histories:
+        return {}
+    wanted = {
+        user_id: {workout.get('exercise_id') for workout in history} - {None}
+        for user_id, history in histories.items()
+    }
+    rows = db.session.execute(
+        select(PersonalRecord, Exercise.name)
+        .join(Exercise, Exercise.id == PersonalRecord.exercise_id)
+        .where(
+            PersonalRecord.user_id.in_(list(wanted)),
+            PersonalRecord.exercise_id.in_(set().union(*wanted.values()) or [0])
+        )
+    ).all()
+    all_trends = trends(list(wanted), weeks)
+
+    summaries = {}
+    for record, name in rows:
+        if record.exercise_id not in wanted[record.user_id]:
+            continue
+        summary = {'exercise': name}
+        for metric in METRICS:
+            if getattr(record, f'max_{metric}') is not None:
+                summary[f'best_{metric}'] = getattr(record, f'max_{metric}')
+        trend = all_trends.get(record.user_id, {}).get(record.exercise_id)
+        if trend is not None:
+            summary[f'{trend["metric"]}_trend'] = trend['direction']
+        summaries.setdefault(record.user_id, []).append(summary)
+    for summary in summaries.values():
+        summary.sort(key=lambda entry: entry['exercise'])
+    return summaries
+
+
+def prompt_summary(user_id, history, weeks=DEFAULT_TREND_WEEKS):
+    """prompt_summaries() for one user; None when there is nothing to send"""
+    return prompt_summaries({user_id: history}, weeks).get(user_id)
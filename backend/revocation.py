@@ -0,0 +1,194 @@
+"""
+JWT Revocation
+Shared, self-expiring revoked-token store with an in-process Bloom filter
+
+Logout records the token's jti together with its exp; entries vanish once the
+token would have expired anyway. Expired entries are purged by the next logout,
+so the read path (filter refresh, lookups) never writes. Every @jwt_required request asks
+is_revoked(jti): the Bloom filter answers "definitely not revoked" without any
+I/O, and only possible hits are confirmed against the store.
+
+The filter is rebuilt from the store every JWT_REVOCATION_REFRESH seconds
+(default 5), so a logout handled by one gunicorn worker is enforced by the
+others within that interval; the worker that handled it enforces it at once.
+
+Backends (JWT_REVOCATION_STORE):
+  - database (default): revoked_tokens table in the app database
+  - memory://: per-process, for tests and single-process runs
+  - redis://host:port/db: requires the optional `redis` package
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from models import db, RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class MemoryRevocationStore:
+    """Per-process store: jti -> expiry (unix seconds)"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            for expired in [j for j, exp in self._entries.items() if exp <= now]:
+                del self._entries[expired]
+            self._entries[jti] = expires_at
+
+    def contains(self, jti):
+        with self._lock:
+            expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def active_jtis(self):
+        now = time.time()
+        with self._lock:
+            return [jti for jti, exp in self._entries.items() if exp > now]
+
+
+class DatabaseRevocationStore:
+    """Store in the app database, shared by every worker (requires an app context)"""
+
+    def add(self, jti, expires_at):
+        # Purge in the logout's own write transaction (indexed on expires_at)
+        RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+        db.session.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(expires_at)))
+        db.session.commit()
+
+    def contains(self, jti):
+        return db.session.query(RevokedToken.jti).filter(
+            RevokedToken.jti == jti,
+            RevokedToken.expires_at > datetime.utcnow()
+        ).first() is not None
+
+    def active_jtis(self):
+        return [
+            jti for (jti,) in db.session.query(RevokedToken.jti).filter(
+                RevokedToken.expires_at > datetime.utcnow()
+            )
+        ]
+
+
+class RedisRevocationStore:
+    """Store in Redis; keys carry their own TTL, an index set feeds filter rebuilds"""
+
+    INDEX_KEY = 'fitlog:revoked'
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('redis:// revocation stores require the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+
+    def add(self, jti, expires_at):
+        ttl = max(1, int(expires_at - time.time()))
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self.INDEX_KEY, '-inf', time.time())
+        pipe.set(f'{self.INDEX_KEY}:{jti}', 1, ex=ttl)
+        pipe.zadd(self.INDEX_KEY, {jti: expires_at})
+        pipe.execute()
+
+    def contains(self, jti):
+        return bool(self.client.exists(f'{self.INDEX_KEY}:{jti}'))
+
+    def active_jtis(self):
+        return [jti.decode() for jti in self.client.zrangebyscore(self.INDEX_KEY, f'({time.time()}', '+inf')]
+
+
+def create_store(spec):
+    """Build a revocation store from JWT_REVOCATION_STORE"""
+    if spec in (None, '', 'database'):
+        return DatabaseRevocationStore()
+    if spec.startswith('memory://'):
+        return MemoryRevocationStore()
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisRevocationStore(spec)
+    raise ValueError(f'Unsupported revocation store: {spec}')
+
+
+class RevocationList:
+    """Bloom-filter front for a revocation store"""
+
+    def __init__(self, store, refresh_interval=5.0, capacity=100000):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return
+            bloom = BloomFilter(self.capacity)
+            for jti in self.store.active_jtis():
+                bloom.add(jti)
+            self._bloom = bloom
+            self._refreshed_at = now
+
+    def revoke(self, jti, expires_at):
+        """Revoke a token until its expiry (unix seconds)"""
+        with self._lock:
+            self.store.add(jti, expires_at)
+            self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self._maybe_refresh()
+        if jti not in self._bloom:
+            return False
+        return self.store.contains(jti)
+
+
+_revocation_list = None
+
+
+def get_revocation_list():
+    return _revocation_list
+
+
+def init_revocation(jwt):
+    """Create the process-wide revocation list and register it with Flask-JWT-Extended"""
+    global _revocation_list
+    _revocation_list = RevocationList(
+        create_store(os.environ.get('JWT_REVOCATION_STORE', 'database')),
+        refresh_interval=float(os.environ.get('JWT_REVOCATION_REFRESH', 5)),
+    )
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return _revocation_list.is_revoked(jwt_payload['jti'])
+
+    return _revocation_list
@@ -0,0 +1,51 @@
+"""
+Rule Engine
+Compiles a declarative keyword -> suggestion table into a single regex
+
+Rules are (keywords, suggestion) pairs listed in priority order. All keywords
+are compiled once into one alternation anchored at word starts, so matching an
+exercise name is a single scan whose cost does not grow with a chain of checks.
+When several rules match, the earliest rule in the table wins, which preserves
+the priority of the old if-chain. Anchoring at word starts means 'row' matches
+"Rows" or "Rowing" but not "Narrow" or "Throw".
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Rule = Tuple[Iterable[str], Dict[str, Any]]
+
+
+class RuleEngine:
+    """Single-pass, priority-aware keyword matcher"""
+
+    def __init__(self, rules: List[Rule], default: Dict[str, Any]):
+        self.default = default
+        self._suggestions = []
+        self._priority = {}
+        for index, (keywords, suggestion) in enumerate(rules):
+            self._suggestions.append(suggestion)
+            for keyword in keywords:
+                # First (highest-priority) rule to claim a keyword keeps it
+                self._priority.setdefault(keyword.lower(), index)
+
+        # Longest keywords first so overlapping alternatives capture the most specific one
+        alternatives = sorted(self._priority, key=len, reverse=True)
+        self._pattern = re.compile(r'\b(' + '|'.join(map(re.escape, alternatives)) + ')') if alternatives else None
+
+    def match(self, text: str) -> Optional[int]:
+        """Index of the highest-priority rule whose keyword appears in text, or None"""
+        if not text or self._pattern is None:
+            return None
+        best = None
+        for found in self._pattern.finditer(text.lower()):
+            index = self._priority[found.group(1)]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return best
+
+    def suggest(self, text: str) -> Dict[str, Any]:
+        """Suggestion of the matching rule (a fresh copy), or the default"""
+        index = self.match(text)
+        return dict(self.default if index is None else self._suggestions[index])
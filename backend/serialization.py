@@ -0,0 +1,75 @@
+"""
+Serialization
+Fast JSON encoding for workout and user responses
+
+Read paths select only the response columns as plain tuples (no ORM identity
+map or per-row object construction) and turn them into dicts with zip().
+Payloads are encoded straight to bytes with orjson when it is installed,
+which also formats datetimes natively; otherwise the stdlib encoder is used
+with an isoformat() fallback for datetimes. Output matches Model.to_dict().
+"""
+from datetime import date, datetime
+
+from flask import Response
+from sqlalchemy import select
+
+from models import db, Workout, User
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+    import json
+
+WORKOUT_FIELDS = ('id', 'user_id', 'exercise', 'exercise_id', 'sets', 'reps', 'duration', 'completed', 'timestamp')
+USER_FIELDS = ('id', 'username', 'email', 'created_at')
+
+WORKOUT_COLUMNS = tuple(getattr(Workout, name) for name in WORKOUT_FIELDS)
+USER_COLUMNS = tuple(getattr(User, name) for name in USER_FIELDS)
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(payload):
+        """Encode a payload to JSON bytes"""
+        return orjson.dumps(payload)
+else:
+    def dumps(payload):
+        """Encode a payload to JSON bytes"""
+        return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+
+def json_response(payload, status=200):
+    """Response with a pre-encoded JSON body (drop-in for jsonify on hot paths)"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def select_workouts():
+    """SELECT of the workout response columns; add where/order_by/limit as needed"""
+    return select(*WORKOUT_COLUMNS)
+
+
+def workout_dicts(rows):
+    """Dicts in Workout.to_dict() shape from WORKOUT_COLUMNS rows (timestamps left for the encoder)"""
+    return [dict(zip(WORKOUT_FIELDS, row)) for row in rows]
+
+
+def fetch_workouts(query):
+    """Execute a select_workouts() query and return its rows"""
+    return db.session.execute(query).all()
+
+
+def fetch_user_profile(user_id):
+    """User.to_dict() for a user straight from its columns, or None"""
+    row = db.session.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    profile = dict(zip(USER_FIELDS, row))
+    created_at = profile['created_at']
+    profile['created_at'] = created_at.isoformat() if created_at else None
+    return profile
@@ -0,0 +1,260 @@
+"""
+Workout Stats Rollup
+Incremental maintenance and bulk rebuild of the per-day, per-exercise rollup
+table, plus the aggregation used by GET /api/workouts/stats
+
+Rows are keyed by catalog exercise_id, so spellings of one exercise share a
+row and per-exercise stats are an integer GROUP BY joined to the catalog.
+
+The write endpoints call apply_workout / apply_completion inside their own
+transaction, so the rollup is always consistent with the workouts table.
+Workouts that predate the rollup are counted by init_rollup() at startup; until
+then, removing or completing one only touches rows that already exist.
+"""
+import json
+from collections import OrderedDict
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, inspect, select, case
+
+from models import db, Exercise, WorkoutDailyStat
+from archive import TIERS, all_workouts_table
+from records import rebuild_records
+
+
+def _workout_volume(workout):
+    """Training volume of a single workout (sets x reps)"""
+    return (workout.sets or 0) * (workout.reps or 0)
+
+
+def _get_or_create_row(user_id, day, exercise_id, create=True):
+    """Fetch (or create) a rollup row by key; None when missing and create is False"""
+    if exercise_id is None:
+        return None  # not linked to the catalog yet (backfilled by init_schema)
+    row = db.session.get(WorkoutDailyStat, (user_id, day, exercise_id))
+    if row is None and create:
+        row = WorkoutDailyStat(
+            user_id=user_id, day=day, exercise_id=exercise_id,
+            workout_count=0, completed_count=0, total_sets=0,
+            total_reps=0, total_volume=0, total_duration=0
+        )
+        db.session.add(row)
+    return row
+
+
+def _rollup_row(workout, create=True):
+    """Fetch (or create) the rollup row a workout belongs to"""
+    return _get_or_create_row(workout.user_id, workout.timestamp.date(), workout.exercise_id, create)
+
+
+def _drop_if_empty(row):
+    """Remove a row whose workouts are all gone (a pending row is just discarded)"""
+    if row.workout_count > 0:
+        return
+    if row in db.session.new:
+        db.session.expunge(row)
+    else:
+        db.session.delete(row)
+
+
+def apply_workout(workout, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a workout's contribution to the rollup
+    Must be called after the workout is flushed so its timestamp is populated
+    """
+    row = _rollup_row(workout, create=sign > 0)
+    if row is None:
+        return  # workout predates the rollup (or the catalog); nothing to subtract
+    row.workout_count += sign
+    row.completed_count += sign if workout.completed else 0
+    row.total_sets += sign * (workout.sets or 0)
+    row.total_reps += sign * (workout.reps or 0)
+    row.total_volume += sign * _workout_volume(workout)
+    row.total_duration += sign * (workout.duration or 0)
+    _drop_if_empty(row)
+
+
+def new_bulk_buckets():
+    """Accumulator for apply_bulk: (day, exercise_id) -> [count, completed, sets, reps, volume, duration]"""
+    return {}
+
+
+def add_to_buckets(buckets, row, sign=1):
+    """Accumulate one workout row (a mapping of workouts columns) into bulk buckets"""
+    sets, reps = row.get('sets') or 0, row.get('reps') or 0
+    bucket = buckets.setdefault((row['timestamp'].date(), row['exercise_id']), [0, 0, 0, 0, 0, 0])
+    bucket[0] += sign
+    bucket[1] += sign if row.get('completed') else 0
+    bucket[2] += sign * sets
+    bucket[3] += sign * reps
+    bucket[4] += sign * sets * reps
+    bucket[5] += sign * (row.get('duration') or 0)
+
+
+def add_completion_to_buckets(buckets, row):
+    """Accumulate a workout that transitions to completed into bulk buckets"""
+    buckets.setdefault((row['timestamp'].date(), row['exercise_id']), [0, 0, 0, 0, 0, 0])[1] += 1
+
+
+def apply_bulk(user_id, buckets):
+    """Fold accumulated bulk totals (positive or negative) into the rollup, one row touch per key"""
+    for (day, exercise_id), (count, completed, sets, reps, volume, duration) in buckets.items():
+        # Only added workouts create rows; removals and completions need an existing one
+        row = _get_or_create_row(user_id, day, exercise_id, create=count > 0)
+        if row is None:
+            continue
+        row.workout_count += count
+        row.completed_count += completed
+        row.total_sets += sets
+        row.total_reps += reps
+        row.total_volume += volume
+        row.total_duration += duration
+        _drop_if_empty(row)
+
+
+def apply_completion(workout):
+    """Count a workout that just transitioned to completed (never creates a row)"""
+    row = _rollup_row(workout, create=False)
+    if row is not None:
+        row.completed_count += 1
+
+
+def rebuild_rollup(user_id=None):
+    """
+    Recompute the rollup from both workout tiers (hot and archived) in one INSERT ... SELECT
+    Rebuilds every user unless user_id is given; returns the number of rollup rows
+    """
+    delete_query = WorkoutDailyStat.query
+    if user_id is not None:
+        delete_query = delete_query.filter_by(user_id=user_id)
+    delete_query.delete(synchronize_session=False)
+
+    filters = {'user_id': user_id} if user_id is not None else {}
+    workouts = all_workouts_table(**filters).c
+    day = func.date(workouts.timestamp)
+    source = select(
+        workouts.user_id,
+        day,
+        workouts.exercise_id,
+        func.count(workouts.id),
+        func.sum(case((workouts.completed.is_(True), 1), else_=0)),
+        func.coalesce(func.sum(workouts.sets), 0),
+        func.coalesce(func.sum(workouts.reps), 0),
+        func.coalesce(func.sum(func.coalesce(workouts.sets, 0) * func.coalesce(workouts.reps, 0)), 0),
+        func.coalesce(func.sum(workouts.duration), 0),
+    ).where(workouts.exercise_id.is_not(None)).group_by(workouts.user_id, day, workouts.exercise_id)
+
+    db.session.execute(insert(WorkoutDailyStat).from_select([
+        'user_id', 'day', 'exercise_id', 'workout_count', 'completed_count',
+        'total_sets', 'total_reps', 'total_volume', 'total_duration'
+    ], source))
+    db.session.commit()
+
+    count_query = WorkoutDailyStat.query
+    if user_id is not None:
+        count_query = count_query.filter_by(user_id=user_id)
+    return count_query.count()
+
+
+def init_rollup():
+    """
+    Startup hook: rebuild the rollup when it does not account for every catalog-linked
+    workout (new or empty table on a database with existing workouts, or drift).
+    A table still keyed by exercise name is dropped and rebuilt by exercise_id.
+    """
+    table = WorkoutDailyStat.__table__
+    columns = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    if 'exercise_id' not in columns:
+        table.drop(db.engine)
+        table.create(db.engine)
+
+    stored = db.session.execute(select(func.coalesce(func.sum(WorkoutDailyStat.workout_count), 0))).scalar()
+    actual = sum(db.session.execute(select(func.count(model.exercise_id))).scalar() for model in TIERS)
+    if stored != actual:
+        rebuild_rollup()
+
+
+def _empty_bucket():
+    return {'workouts': 0, 'completed': 0, 'reps': 0, 'duration': 0}
+
+
+def summarize(user_id, since=None):
+    """
+    Build the stats response from rollup rows only (O(days x exercises), not O(workouts))
+    since: optional date; only days on or after it are included
+    """
+    filters = [WorkoutDailyStat.user_id == user_id]
+    if since is not None:
+        filters.append(WorkoutDailyStat.day >= since)
+
+    per_day_rows = db.session.query(
+        WorkoutDailyStat.day,
+        func.sum(WorkoutDailyStat.workout_count),
+        func.sum(WorkoutDailyStat.completed_count),
+        func.sum(WorkoutDailyStat.total_sets),
+        func.sum(WorkoutDailyStat.total_reps),
+        func.sum(WorkoutDailyStat.total_duration),
+    ).filter(*filters).group_by(WorkoutDailyStat.day).order_by(WorkoutDailyStat.day).all()
+
+    per_exercise_rows = db.session.query(
+        Exercise.id,
+        Exercise.name,
+        Exercise.muscle_groups,
+        func.sum(WorkoutDailyStat.workout_count),
+        func.sum(WorkoutDailyStat.total_sets),
+        func.sum(WorkoutDailyStat.total_reps),
+        func.sum(WorkoutDailyStat.total_volume),
+        func.sum(WorkoutDailyStat.total_duration),
+    ).join(Exercise, Exercise.id == WorkoutDailyStat.exercise_id).filter(*filters).group_by(
+        WorkoutDailyStat.exercise_id
+    ).order_by(func.sum(WorkoutDailyStat.total_volume).desc(), Exercise.name).all()
+
+    totals = {'workouts': 0, 'completed': 0, 'sets': 0, 'reps': 0, 'duration': 0}
+    per_day = []
+    per_week = OrderedDict()
+    for day, workouts, completed, sets, reps, duration in per_day_rows:
+        totals['workouts'] += workouts
+        totals['completed'] += completed
+        totals['sets'] += sets
+        totals['reps'] += reps
+        totals['duration'] += duration
+        per_day.append({
+            'day': day.isoformat(), 'workouts': workouts, 'completed': completed,
+            'reps': reps, 'duration': duration
+        })
+
+        # Weeks start on Monday
+        week = per_week.setdefault((day - timedelta(days=day.weekday())).isoformat(), _empty_bucket())
+        week['workouts'] += workouts
+        week['completed'] += completed
+        week['reps'] += reps
+        week['duration'] += duration
+
+    totals['completion_rate'] = round(totals['completed'] / totals['workouts'], 4) if totals['workouts'] else 0.0
+
+    per_exercise = [
+        {
+            'exercise': name, 'exercise_id': exercise_id, 'muscle_groups': json.loads(muscles or '[]'),
+            'workouts': workouts, 'sets': sets, 'reps': reps, 'volume': volume, 'duration': duration
+        }
+        for exercise_id, name, muscles, workouts, sets, reps, volume, duration in per_exercise_rows
+    ]
+
+    return {
+        'totals': totals,
+        'per_day': per_day,
+        'per_week': [dict(week_start=week_start, **bucket) for week_start, bucket in per_week.items()],
+        'per_exercise': per_exercise
+    }
+
+
+@click.command('rebuild-stats')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user')
+@with_appcontext
+def rebuild_stats_command(user_id):
+    """Recompute the workout stats rollup and personal records from the workouts tables"""
+    rows = rebuild_rollup(user_id)
+    click.echo(f'Rebuilt workout stats rollup: {rows} rows')
+    click.echo(f'Rebuilt personal records: {rebuild_records(user_id)} rows')
@@ -0,0 +1,124 @@
+"""
+Background Suggestion Jobs
+Runs AI suggestion generation off the request thread
+
+create_workout stores a pending Suggestion row and hands the slow xAI call to
+a bounded thread pool, so a slow upstream never holds a gunicorn worker.
+Results are written back to the suggestions table, so any worker process can
+serve GET /api/workouts/suggestions/<id>.
+
+Environment:
+  - SUGGESTION_WORKERS (optional): background threads per process, default 4
+  - SUGGESTION_QUEUE_SIZE (optional): jobs allowed to wait for a thread, default 32
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, Suggestion
+from ai_suggestions import get_next_suggestion, get_cached_suggestion
+from records import prompt_summary
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    """Create the process-wide executor on first use (after gunicorn forks)"""
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = int(os.environ.get('SUGGESTION_WORKERS', 4))
+            queue_size = int(os.environ.get('SUGGESTION_QUEUE_SIZE', 32))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='suggestion')
+            # Running + queued jobs; beyond this, submissions are rejected instead of piling up
+            _slots = threading.BoundedSemaphore(workers + queue_size)
+    return _executor, _slots
+
+
+def _store_result(suggestion, result, status=Suggestion.STATUS_READY):
+    suggestion.status = status
+    suggestion.payload = json.dumps(result) if result is not None else None
+    suggestion.completed_at = datetime.utcnow()
+
+
+def _run_job(app, suggestion_id, exercise, recent_payload, records):
+    """Worker-thread body: generate the suggestion and persist it"""
+    with app.app_context():
+        suggestion = db.session.get(Suggestion, suggestion_id)
+        if suggestion is None:
+            return
+        try:
+            _store_result(suggestion, get_next_suggestion(exercise, recent_workouts=recent_payload, records=records))
+        except Exception:
+            app.logger.exception('Suggestion job %s failed', suggestion_id)
+            _store_result(suggestion, None, status=Suggestion.STATUS_FAILED)
+        db.session.commit()
+
+
+def enqueue_suggestion(user_id, workout_id, exercise, recent_payload):
+    """
+    Create a Suggestion row and schedule its generation
+    Rule-based suggestions (no XAI_API_KEY) and cached xAI suggestions are stored
+    ready immediately.
+    If the pool is saturated the job falls back to rules inline rather than queueing
+    without bound. Commits the session.
+    """
+    suggestion = Suggestion(user_id=user_id, workout_id=workout_id, status=Suggestion.STATUS_PENDING)
+    db.session.add(suggestion)
+
+    if not os.environ.get('XAI_API_KEY'):
+        _store_result(suggestion, get_next_suggestion(exercise))
+        db.session.commit()
+        return suggestion
+
+    records = prompt_summary(user_id, recent_payload)
+    cached = get_cached_suggestion(recent_payload, records)
+    if cached is not None:
+        _store_result(suggestion, cached)
+        db.session.commit()
+        return suggestion
+
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        _store_result(suggestion, get_next_suggestion(exercise))
+        db.session.commit()
+        return suggestion
+
+    db.session.commit()
+    app = current_app._get_current_object()
+    try:
+        future = executor.submit(_run_job, app, suggestion.id, exercise, recent_payload, records)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return suggestion
+
+
+def fail_suggestion(user_id, workout_id):
+    """
+    Call when enqueue_suggestion raised after the workout was committed: mark the
+    workout's suggestion failed (the row it may already have committed, or a new
+    one). Returns the row, or None if it cannot be written either.
+    """
+    db.session.rollback()
+    try:
+        suggestion = Suggestion.query.filter_by(user_id=user_id, workout_id=workout_id).order_by(
+            Suggestion.id.desc()
+        ).first()
+        if suggestion is None:
+            suggestion = Suggestion(user_id=user_id, workout_id=workout_id)
+            db.session.add(suggestion)
+        _store_result(suggestion, None, status=Suggestion.STATUS_FAILED)
+        db.session.commit()
+        return suggestion
+    except Exception:
+        current_app.logger.exception('Could not record failed suggestion for workout %s', workout_id)
+        db.session.rollback()
+        return None
@@ -0,0 +1,73 @@
+"""
+User Profile Cache
+Per-process cache of User.to_dict() for the authenticated user
+
+The profile behind GET /api/auth/me almost never changes, so it is cached in
+memory with a TTL and evicted whenever a User row is updated or deleted through
+the ORM in this process. Other workers pick up changes within the TTL.
+
+/me is the only endpoint that loads the user behind the JWT: workout endpoints
+use the identity as user_id directly, and signup/login look users up by
+username or email and need the row itself, so they stay uncached.
+
+Environment:
+  - USER_CACHE_SIZE (optional): profiles kept per process, default 1024
+  - USER_CACHE_TTL (optional): seconds a profile may be served from cache, default 60
+"""
+import hashlib
+import os
+import threading
+
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+from cache import MemoryCache
+from models import User
+from serialization import dumps, fetch_user_profile
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MemoryCache(
+                maxsize=int(os.environ.get('USER_CACHE_SIZE', 1024)),
+                ttl=float(os.environ.get('USER_CACHE_TTL', 60)),
+            )
+    return _cache
+
+
+def profile_etag(profile):
+    """Strong ETag for a profile dict"""
+    return hashlib.sha1(dumps(profile)).hexdigest()
+
+
+def get_user_profile(user_id):
+    """Return (profile, etag) for a user, or (None, None) if it does not exist"""
+    cache = _get_cache()
+    entry = cache.get(user_id)
+    if entry is None:
+        profile = fetch_user_profile(user_id)
+        if profile is None:
+            return None, None
+        entry = (profile, profile_etag(profile))
+        cache.set(user_id, entry)
+    return entry
+
+
+def get_current_user_profile():
+    """(profile, etag) of the user in the request's JWT; requires jwt_required()"""
+    return get_user_profile(int(get_jwt_identity()))
+
+
+def invalidate_user(user_id):
+    _get_cache().delete(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _evict_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
@@ -2,17 +2,96 @@
 Workouts Blueprint
 Endpoints for workout CRUD operations with AI suggestions
 """
-from flask import Blueprint, request, jsonify
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Workout
-from ai_suggestions import get_next_suggestion
+from sqlalchemy import select, update, delete, insert
+from models import db, Workout, WorkoutChange, Suggestion
+from ai_suggestions import get_next_suggestion, get_suggestion_cache, is_rule_fallback
+import stats
+import records
+from suggestion_jobs import enqueue_suggestion, fail_suggestion
+from bulk_import import iter_payload, import_workouts, BulkImportError
+import export
+from serialization import json_response, workout_dicts
+from exercises import resolve_exercise_id, exercise_name
+from precompute import get_precomputed, invalidate_precomputed
+from archive import TIERS, fetch_page, fetch_by_ids, get_workout
 
 workouts_bp = Blueprint('workouts', __name__)
 
+# Page size bounds for GET /api/workouts
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Maximum number of change-log entries scanned per GET /api/workouts/changes call
+MAX_CHANGES_PER_SYNC = 500
+
+# Maximum number of ids per POST /api/workouts/batch call
+MAX_BATCH_IDS = 500
+
+
+def _record_change(user_id, workout_id, op):
+    """Append a change-log entry in the current transaction (committed by the caller)"""
+    db.session.add(WorkoutChange(user_id=user_id, workout_id=workout_id, op=op))
+
+
+def _encode_cursor(workout):
+    """Encode the (timestamp, id) position of a workout as an opaque cursor"""
+    raw = json.dumps([workout.timestamp.isoformat(), workout.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """Decode an opaque cursor back into (timestamp, id); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, workout_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(workout_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def _parse_limit(value):
+    """Parse the ?limit= query parameter, clamped to [1, MAX_PAGE_SIZE]"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _version_etag(user_id, version, *parts):
+    """ETag derived from the user's change version and the request parameters that shape the response"""
+    raw = json.dumps([user_id, version, *parts])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _conditional(payload, etag):
+    """200 with the JSON payload, or 304 without a body if the client already has this ETag"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = json_response(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @workouts_bp.route('', methods=['POST'])
 @jwt_required()
 def create_workout():
-    """Create a new workout and get AI suggestion"""
+    """
+    Create a new workout and schedule its AI suggestion
+    The suggestion is generated in the background; poll
+    GET /api/workouts/suggestions/<suggestion_id> until its status is 'ready'
+    """
     try:
         user_id = int(get_jwt_identity())
         data = request.get_json()
@@ -26,28 +105,45 @@ def create_workout():
         if not exercise:
             return jsonify({'error': 'Exercise name is required'}), 400
         
-        # Create workout
+        # Create workout (exercise_id links the entered name to the catalog)
         new_workout = Workout(
             user_id=user_id,
             exercise=exercise,
+            exercise_id=resolve_exercise_id(exercise),
             sets=sets,
             reps=reps,
             duration=duration
         )
         
         db.session.add(new_workout)
+        db.session.flush()
+        _record_change(user_id, new_workout.id, WorkoutChange.OP_UPSERT)
+        stats.apply_workout(new_workout)
+        records.apply_workout(new_workout)
+        invalidate_precomputed(user_id)
         db.session.commit()
+        workout = new_workout.to_dict()
         
-        # Prepare recent history (most recent first, limited)
-        recent = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).limit(5).all()
-        recent_payload = [w.to_dict() for w in recent]
+        # The workout is saved: from here on a failure only fails its suggestion,
+        # so a client never retries (and duplicates) a logged workout
+        try:
+            # Prepare recent history (most recent first, limited)
+            recent = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).limit(5).all()
+            recent_payload = [w.to_dict() for w in recent]
 
-        # Get AI suggestion (xAI if configured, else rule-based)
-        suggestion = get_next_suggestion(exercise, recent_workouts=recent_payload)
+            # Schedule AI suggestion (xAI in the background if configured, else rule-based inline)
+            suggestion = enqueue_suggestion(
+                user_id, workout['id'], exercise_name(workout['exercise_id'], exercise), recent_payload
+            )
+        except Exception:
+            current_app.logger.exception('Scheduling the suggestion for workout %s failed', workout['id'])
+            suggestion = fail_suggestion(user_id, workout['id'])
         
         return jsonify({
-            'workout': new_workout.to_dict(),
-            'suggestion': suggestion,
+            'workout': workout,
+            'suggestion': suggestion.to_dict()['suggestion'] if suggestion else None,
+            'suggestion_id': suggestion.id if suggestion else None,
+            'suggestion_status': suggestion.status if suggestion else Suggestion.STATUS_FAILED,
             'message': 'Workout logged successfully'
         }), 201
         
@@ -55,21 +151,288 @@ def create_workout():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@workouts_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_workouts():
+    """
+    Import many workouts at once (JSON array or NDJSON stream)
+    Each item: exercise (required), sets, reps, duration, completed, timestamp (ISO 8601)
+    All rows are imported in one transaction or none are; no AI suggestions are generated
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            imported, errors = import_workouts(user_id, iter_payload(request))
+        except BulkImportError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        if errors:
+            return jsonify({'error': 'Validation failed, nothing was imported', 'errors': errors}), 400
+        
+        return jsonify({
+            'imported': imported,
+            'version': WorkoutChange.latest_version(user_id),
+            'message': f'{imported} workouts imported successfully'
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @workouts_bp.route('', methods=['GET'])
 @jwt_required()
 def get_workouts():
-    """Get all workouts for the current user"""
+    """
+    Get a page of workouts for the current user, most recent first
+    Query params: limit (default 50, max 200), cursor (next_cursor from the previous page)
+    Pages past the hot window read through to the archive transparently
+    Sends an ETag; If-None-Match is answered with 304 before the page is queried
+    """
     try:
         user_id = int(get_jwt_identity())
         
-        # Get workouts ordered by most recent first
-        workouts = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).all()
+        try:
+            limit = _parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            position = _decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Every write bumps the change version, so it identifies the page contents
+        version = WorkoutChange.latest_version(user_id)
+        etag = _version_etag(user_id, version, limit, cursor)
+        if request.if_none_match.contains(etag):
+            return _conditional(None, etag)
+        
+        # Keyset pagination on (timestamp, id): fetch one extra row to know if there is a next page
+        workouts = fetch_page(user_id, limit + 1, position)
+        has_more = len(workouts) > limit
+        workouts = workouts[:limit]
+        
+        return _conditional({
+            'workouts': workout_dicts(workouts),
+            'next_cursor': _encode_cursor(workouts[-1]) if has_more else None,
+            'version': version
+        }, etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workouts_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_workouts():
+    """
+    Stream the user's full workout history, oldest first
+    Query params: format (csv | ndjson, default csv);
+    after_timestamp + after_id to resume after the last row received
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in export.STREAMERS:
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        after = None
+        if request.args.get('after_timestamp') or request.args.get('after_id'):
+            try:
+                after = (
+                    datetime.fromisoformat(request.args['after_timestamp']),
+                    int(request.args['after_id'])
+                )
+            except (KeyError, ValueError):
+                return jsonify({'error': 'after_timestamp (ISO 8601) and after_id are required together'}), 400
+        
+        body = export.STREAMERS[fmt](export.export_rows(user_id, after=after))
+        return Response(
+            stream_with_context(body),
+            mimetype=export.CONTENT_TYPES[fmt],
+            headers={'Content-Disposition': f'attachment; filename=workouts.{fmt}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workouts_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """
+    Incremental sync: workouts inserted, updated or deleted since a change version
+    Query params: since (version from a previous list/changes response, default 0)
+    Returns upserted rows, deleted ids and the new version to pass as `since` next time
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({'error': 'since must be an integer'}), 400
+        
+        changes = WorkoutChange.query.filter(
+            WorkoutChange.user_id == user_id,
+            WorkoutChange.id > since
+        ).order_by(WorkoutChange.id).limit(MAX_CHANGES_PER_SYNC + 1).all()
+        has_more = len(changes) > MAX_CHANGES_PER_SYNC
+        changes = changes[:MAX_CHANGES_PER_SYNC]
+        
+        # Collapse to the final op per workout; later entries win
+        latest_ops = {}
+        for change in changes:
+            latest_ops[change.workout_id] = change.op
+        
+        upserted_ids = [wid for wid, op in latest_ops.items() if op == WorkoutChange.OP_UPSERT]
+        rows = fetch_by_ids(user_id, upserted_ids) if upserted_ids else []
+        found_ids = {w.id for w in rows}
+        
+        # An upsert whose row is gone was deleted by a change beyond this batch; report it as deleted
+        deleted_ids = [wid for wid, op in latest_ops.items()
+                       if op == WorkoutChange.OP_DELETE or wid not in found_ids]
+        
+        return json_response({
+            'upserted': workout_dicts(rows),
+            'deleted': deleted_ids,
+            'version': changes[-1].id if changes else since,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workouts_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_stats():
+    """
+    Aggregated workout stats from the daily rollup table
+    Query params: days (optional, only include the last N days)
+    Returns totals, per-day, per-week and per-exercise breakdowns
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        since = None
+        if request.args.get('days'):
+            try:
+                days = int(request.args['days'])
+            except ValueError:
+                return jsonify({'error': 'days must be an integer'}), 400
+            since = datetime.utcnow().date() - timedelta(days=max(days, 1) - 1)
+        
+        return jsonify({'stats': stats.summarize(user_id, since=since)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workouts_bp.route('/records', methods=['GET'])
+@jwt_required()
+def get_records():
+    """
+    Personal records and weekly trend line per exercise
+    Query params: weeks (trend length, default 8, max 52)
+    Records are maintained on write, so this reads one row per exercise plus the rollup
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            weeks = max(1, min(int(request.args.get('weeks', records.DEFAULT_TREND_WEEKS)), 52))
+        except ValueError:
+            return jsonify({'error': 'weeks must be an integer'}), 400
+        
+        # Trend weeks roll over with the calendar, so the date is part of the ETag
+        version = WorkoutChange.latest_version(user_id)
+        etag = _version_etag(user_id, version, 'records', weeks, datetime.utcnow().date().isoformat())
+        if request.if_none_match.contains(etag):
+            return _conditional(None, etag)
+        
+        return _conditional({'records': records.summarize(user_id, weeks)}, etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workouts_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_update_workouts():
+    """
+    Complete or delete many workouts in one request
+    Body: {"action": "complete" | "delete", "ids": [1, 2, 3]}
+    Runs one ownership-checked UPDATE/DELETE in a single transaction and
+    reports a result per id: completed, already_completed, deleted or not_found
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        
+        action = data.get('action')
+        ids = data.get('ids')
+        if action not in ('complete', 'delete'):
+            return jsonify({'error': 'action must be complete or delete'}), 400
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'ids must be a non-empty list of integers'}), 400
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({'error': f'At most {MAX_BATCH_IDS} ids per batch'}), 400
+        
+        ids = list(dict.fromkeys(ids))
+        owned = {}
+        tier = {}  # workout id -> the table (hot or archive) holding it
+        for model in TIERS:
+            table = model.__table__
+            for row in db.session.execute(
+                select(table.c.id, table.c.exercise, table.c.exercise_id, table.c.sets, table.c.reps,
+                       table.c.duration, table.c.completed, table.c.timestamp)
+                .where(table.c.user_id == user_id, table.c.id.in_(ids))
+            ):
+                owned[row.id] = row._mapping
+                tier[row.id] = table
+        
+        results = {}
+        buckets = stats.new_bulk_buckets()
+        if action == 'complete':
+            changed = [wid for wid, row in owned.items() if not row['completed']]
+            for table in {tier[wid] for wid in changed}:
+                db.session.execute(
+                    update(table).where(table.c.user_id == user_id, table.c.id.in_(changed)).values(completed=True)
+                )
+            for wid in changed:
+                stats.add_completion_to_buckets(buckets, owned[wid])
+            op = WorkoutChange.OP_UPSERT
+            for wid in ids:
+                if wid not in owned:
+                    results[wid] = 'not_found'
+                else:
+                    results[wid] = 'completed' if wid in changed else 'already_completed'
+        else:
+            changed = list(owned)
+            for table in {tier[wid] for wid in changed}:
+                db.session.execute(
+                    delete(table).where(table.c.user_id == user_id, table.c.id.in_(changed))
+                )
+            for wid in changed:
+                stats.add_to_buckets(buckets, owned[wid], sign=-1)
+            if changed:
+                records.remove_workouts(user_id, changed)
+            op = WorkoutChange.OP_DELETE
+            for wid in ids:
+                results[wid] = 'deleted' if wid in owned else 'not_found'
+        
+        if changed:
+            db.session.execute(insert(WorkoutChange.__table__), [
+                {'user_id': user_id, 'workout_id': wid, 'op': op, 'created_at': datetime.utcnow()}
+                for wid in changed
+            ])
+            stats.apply_bulk(user_id, buckets)
+        db.session.commit()
         
         return jsonify({
-            'workouts': [workout.to_dict() for workout in workouts]
+            'results': [{'id': wid, 'result': results[wid]} for wid in ids],
+            'changed': len(changed),
+            'version': WorkoutChange.latest_version(user_id)
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @workouts_bp.route('/<int:workout_id>/complete', methods=['PUT'])
@@ -79,12 +442,15 @@ def mark_complete(workout_id):
     try:
         user_id = int(get_jwt_identity())
         
-        workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first()
+        workout = get_workout(user_id, workout_id)
         
         if not workout:
             return jsonify({'error': 'Workout not found'}), 404
         
+        if not workout.completed:
+            stats.apply_completion(workout)
         workout.completed = True
+        _record_change(user_id, workout.id, WorkoutChange.OP_UPSERT)
         db.session.commit()
         
         return jsonify({
@@ -99,16 +465,19 @@ def mark_complete(workout_id):
 @workouts_bp.route('/<int:workout_id>', methods=['DELETE'])
 @jwt_required()
 def delete_workout(workout_id):
-    """Delete a workout"""
+    """Delete a workout (leaves a tombstone in the change log for synced clients)"""
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         
-        workout = Workout.query.filter_by(id=workout_id, user_id=user_id).first()
+        workout = get_workout(user_id, workout_id)
         
         if not workout:
             return jsonify({'error': 'Workout not found'}), 404
         
+        stats.apply_workout(workout, sign=-1)
         db.session.delete(workout)
+        records.remove_workouts(user_id, [workout_id])
+        _record_change(user_id, workout_id, WorkoutChange.OP_DELETE)
         db.session.commit()
         
         return jsonify({'message': 'Workout deleted successfully'}), 200
@@ -120,30 +489,73 @@ def delete_workout(workout_id):
 @workouts_bp.route('/suggestion', methods=['GET'])
 @jwt_required()
 def get_latest_suggestion():
-    """Get AI suggestion based on latest workout"""
+    """
+    Get AI suggestion based on latest workout
+    Served from precomputed_suggestions when current, otherwise cached per user
+    and change version, so repeat polls with no new activity skip the history
+    query and the xAI call; If-None-Match with the current ETag is answered with 304
+    """
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
+        
+        version = WorkoutChange.latest_version(user_id)
+        etag = _version_etag(user_id, version, 'suggestion')
+        if request.if_none_match.contains(etag):
+            return _conditional(None, etag)
         
-        # Get latest workout
-        latest_workout = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).first()
+        # Built ahead of time by `flask precompute-suggestions`
+        precomputed = get_precomputed(user_id, version)
+        if precomputed is not None:
+            return _conditional({'suggestion': precomputed}, etag)
         
-        if not latest_workout:
-            return jsonify({
+        cache = get_suggestion_cache()
+        cache_key = f'user:{user_id}:v{version}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return _conditional({'suggestion': cached}, etag)
+        
+        # Prepare recent history (most recent first; the first row is the latest workout)
+        recent = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).limit(5).all()
+        
+        if not recent:
+            return _conditional({
                 'suggestion': {
                     'exercise': 'Start with squats',
                     'reason': 'No workouts logged yet. Great starting exercise!'
                 }
-            }), 200
+            }, etag)
         
-        # Prepare recent history
-        recent = Workout.query.filter_by(user_id=user_id).order_by(Workout.timestamp.desc()).limit(5).all()
         recent_payload = [w.to_dict() for w in recent]
 
         # Get suggestion based on latest workout (xAI if configured)
-        suggestion = get_next_suggestion(latest_workout.exercise, recent_workouts=recent_payload)
+        latest = recent[0]
+        exercise = exercise_name(latest.exercise_id, latest.exercise)
+        summary = records.prompt_summary(user_id, recent_payload)
+        db.session.rollback()  # don't hold a pooled connection during the upstream call
+        suggestion = get_next_suggestion(exercise, recent_workouts=recent_payload, records=summary)
+        # A fallback is not pinned to this version, so the next poll retries xAI
+        if not is_rule_fallback(recent_payload, summary):
+            cache.set(cache_key, suggestion)
         
-        return jsonify({'suggestion': suggestion}), 200
+        return _conditional({'suggestion': suggestion}, etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@workouts_bp.route('/suggestions/<int:suggestion_id>', methods=['GET'])
+@jwt_required()
+def get_suggestion_result(suggestion_id):
+    """Poll a background suggestion; 202 while pending, 200 once ready or failed"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        suggestion = Suggestion.query.filter_by(id=suggestion_id, user_id=user_id).first()
+        
+        if not suggestion:
+            return jsonify({'error': 'Suggestion not found'}), 404
+        
+        status_code = 202 if suggestion.status == Suggestion.STATUS_PENDING else 200
+        return jsonify(suggestion.to_dict()), status_code
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
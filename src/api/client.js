@@ -54,10 +54,13 @@ export const authAPI = {
 // Workouts API methods
 export const workoutsAPI = {
   create: (data) => api.post('/workouts', data),
-  getAll: () => api.get('/workouts'),
+  getAll: (cursor) => api.get('/workouts', { params: cursor ? { cursor } : {} }),
+  getChanges: (since) => api.get('/workouts/changes', { params: { since } }),
   markComplete: (id) => api.put(`/workouts/${id}/complete`),
   delete: (id) => api.delete(`/workouts/${id}`),
+  batch: (ids, action) => api.post('/workouts/batch', { ids, action }),
   getSuggestion: () => api.get('/workouts/suggestion'),
+  getSuggestionResult: (id) => api.get(`/workouts/suggestions/${id}`),
 }
 
 export default api
@@ -3,17 +3,20 @@
  * Main app interface with workout logging and AI suggestions
  * Features:
  * - Workout log form (exercise, sets, reps, duration)
- * - List of logged workouts with complete/delete actions
+ * - List of logged workouts with complete/delete actions, paged with "Load more"
  * - Display latest AI suggestion
  * - User logout functionality
  */
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { workoutsAPI, authAPI } from '../api/client'
 import { getExerciseData, ExerciseSVGIcon, ExerciseCard, ExerciseBadge } from '../utils/exerciseImages.jsx'
 
 function Dashboard({ onLogout }) {
   const [workouts, setWorkouts] = useState([])
+  // Cursor of the next (older) page, null once the whole history is loaded
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [suggestion, setSuggestion] = useState(null)
   const [loading, setLoading] = useState(false)
   const [formData, setFormData] = useState({
@@ -23,6 +26,8 @@ function Dashboard({ onLogout }) {
     duration: 0,
   })
   const navigate = useNavigate()
+  // Change version of the loaded list, used for incremental sync
+  const versionRef = useRef(0)
 
   const user = JSON.parse(localStorage.getItem('user') || '{}')
 
@@ -36,11 +41,51 @@ function Dashboard({ onLogout }) {
     try {
       const response = await workoutsAPI.getAll()
       setWorkouts(response.data.workouts || [])
+      setNextCursor(response.data.next_cursor || null)
+      versionRef.current = response.data.version || 0
     } catch (err) {
       console.error('Failed to load workouts:', err)
     }
   }
 
+  // Append the next page of older workouts (rows already synced in are skipped)
+  const loadMoreWorkouts = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const response = await workoutsAPI.getAll(nextCursor)
+      const page = response.data.workouts || []
+      setWorkouts(current => {
+        const loadedIds = new Set(current.map(w => w.id))
+        return [...current, ...page.filter(w => !loadedIds.has(w.id))]
+      })
+      setNextCursor(response.data.next_cursor || null)
+    } catch (err) {
+      console.error('Failed to load more workouts:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  // Apply only the changes made since the last load/sync instead of refetching the list
+  const syncWorkouts = async () => {
+    try {
+      let hasMore = true
+      while (hasMore) {
+        const { data } = await workoutsAPI.getChanges(versionRef.current)
+        const changedIds = new Set([...data.deleted, ...data.upserted.map(w => w.id)])
+        setWorkouts(current => [
+          ...data.upserted,
+          ...current.filter(w => !changedIds.has(w.id)),
+        ].sort((a, b) => (b.timestamp || '').localeCompare(a.timestamp || '') || b.id - a.id))
+        versionRef.current = data.version
+        hasMore = data.has_more
+      }
+    } catch (err) {
+      console.error('Failed to sync workouts:', err)
+    }
+  }
+
   const loadSuggestion = async () => {
     try {
       const response = await workoutsAPI.getSuggestion()
@@ -50,6 +95,25 @@ function Dashboard({ onLogout }) {
     }
   }
 
+  // Poll a background suggestion until it is ready (202 means still pending)
+  const pollSuggestion = async (suggestionId, attempts = 30) => {
+    for (let i = 0; i < attempts; i++) {
+      await new Promise(resolve => setTimeout(resolve, 1000))
+      try {
+        const response = await workoutsAPI.getSuggestionResult(suggestionId)
+        if (response.status !== 202) {
+          if (response.data.suggestion) {
+            setSuggestion(response.data.suggestion)
+          }
+          return
+        }
+      } catch (err) {
+        console.error('Failed to fetch suggestion:', err)
+        return
+      }
+    }
+  }
+
   const handleChange = (e) => {
     const value = e.target.type === 'number' ? parseInt(e.target.value) || 0 : e.target.value
     setFormData({
@@ -69,20 +133,18 @@ function Dashboard({ onLogout }) {
     try {
       const response = await workoutsAPI.create(formData)
       
-      // Add new workout to list
-      setWorkouts([response.data.workout, ...workouts])
-      
-      // Update AI suggestion from response
+      // Update AI suggestion from response, or fetch it once generated in the background
       if (response.data.suggestion) {
         setSuggestion(response.data.suggestion)
+      } else if (response.data.suggestion_status === 'pending') {
+        pollSuggestion(response.data.suggestion_id)
       }
       
       // Reset form
       setFormData({ exercise: '', sets: 1, reps: 0, duration: 0 })
       
-      // Reload to get updated list
-      await loadWorkouts()
-      await loadSuggestion()
+      // Pull the new workout (and any other changes) into the list
+      await syncWorkouts()
     } catch (err) {
       alert(err.response?.data?.error || 'Failed to log workout')
     } finally {
@@ -93,7 +155,7 @@ function Dashboard({ onLogout }) {
   const handleComplete = async (id) => {
     try {
       await workoutsAPI.markComplete(id)
-      await loadWorkouts()
+      await syncWorkouts()
       await loadSuggestion()
     } catch (err) {
       alert(err.response?.data?.error || 'Failed to mark workout as complete')
@@ -107,7 +169,7 @@ function Dashboard({ onLogout }) {
 
     try {
       await workoutsAPI.delete(id)
-      await loadWorkouts()
+      await syncWorkouts()
       await loadSuggestion()
     } catch (err) {
       alert(err.response?.data?.error || 'Failed to delete workout')
@@ -332,6 +394,15 @@ function Dashboard({ onLogout }) {
                       </div>
                     )
                   })}
+                  {nextCursor && (
+                    <button
+                      onClick={loadMoreWorkouts}
+                      disabled={loadingMore}
+                      className="w-full py-3 px-6 border-2 border-gray-200 text-gray-700 rounded-xl hover:border-indigo-300 hover:text-indigo-700 disabled:opacity-50 disabled:cursor-not-allowed transition-all duration-200 font-semibold"
+                    >
+                      {loadingMore ? '⏳ Loading...' : 'Load more'}
+                    </button>
+                  )}
                 </div>
               )}
             </div>